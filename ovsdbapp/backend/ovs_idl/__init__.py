@@ -12,6 +12,7 @@
 
 import logging
 import uuid
+import weakref
 
 from ovs.db import idl
 from ovsdbapp.backend.ovs_idl import command as cmd
@@ -31,6 +32,8 @@ class Backend(object):
     def __init__(self, connection, start=True, auto_index=True, **kwargs):
         super().__init__(**kwargs)
         self.ovsdb_connection = connection
+        # The record lookup function used by _lookup() for each table object
+        self._record_lookups = weakref.WeakKeyDictionary()
         if auto_index:
             if self.ovsdb_connection.is_running:
                 LOG.debug("Connection already started, not creating indices")
@@ -187,6 +190,58 @@ class Backend(object):
                 return default
             raise
 
+    def _row_lookup(self, table, t):
+        # NOTE (twilson) This is an approximation of the db-ctl implementation
+        # that allows a partial table, assuming that if a table has a single
+        # index, that we should be able to do a lookup by it.
+        return self.lookup_table.get(
+            table,
+            idlutils.RowLookup(table, idlutils.get_index_column(t), None))
+
+    def _record_lookup(self, table, t):
+        """Return a function looking up a non-UUID record in table t
+
+        The function only implements the kind of lookup the table's RowLookup
+        requires, and is created once per table. It is called with the table
+        object so that it doesn't hold a reference to it.
+        """
+        try:
+            return self._record_lookups[t]
+        except KeyError:
+            pass
+        rl = self._row_lookup(table, t)
+
+        def _not_found(t, record):
+            raise idlutils.RowNotFound(table=table, col='uuid', match=record)
+
+        def _single_row(t, record):
+            if t.max_rows == 1:
+                return next(iter(t.rows.values()))
+            raise idlutils.RowNotFound(table=table, col='uuid', match=record)
+
+        def _by_value(t, record):
+            return idlutils.row_by_value(self, rl.table, rl.column, record)
+
+        def _by_value_ref(t, record):
+            row = idlutils.row_by_value(self, rl.table, rl.column, record)
+            rows = getattr(row, rl.uuid_column)
+            if len(rows) != 1:
+                raise idlutils.RowNotFound(table=table, col='record',
+                                           match=record)
+            return rows[0]
+
+        # no table means uuid only, no column means lookup table has one row
+        if rl.table is None:
+            fn = _not_found
+        elif rl.column is None:
+            fn = _single_row
+        elif rl.uuid_column:
+            fn = _by_value_ref
+        else:
+            fn = _by_value
+        self._record_lookups[t] = fn
+        return fn
+
     def _lookup(self, table, record):
         if record == "":
             raise TypeError("Cannot look up record by empty string")
@@ -207,7 +262,7 @@ class Backend(object):
                 raise idlutils.RowNotFound(table=table, col='uuid',
                                            match=record) from None
         try:
-            uuid_ = uuid.UUID(record)
+            uuid_ = idlutils._parse_uuid(record)
             return t.rows[uuid_]
         except ValueError:
             # Not a UUID string, continue lookup by other means
@@ -219,24 +274,4 @@ class Backend(object):
         if not self.lookup_table:
             raise idlutils.RowNotFound(table=table, col='record',
                                        match=record)
-        # NOTE (twilson) This is an approximation of the db-ctl implementation
-        # that allows a partial table, assuming that if a table has a single
-        # index, that we should be able to do a lookup by it.
-        rl = self.lookup_table.get(
-            table,
-            idlutils.RowLookup(table, idlutils.get_index_column(t), None))
-        # no table means uuid only, no column means lookup table has one row
-        if rl.table is None:
-            raise idlutils.RowNotFound(table=table, col='uuid', match=record)
-        if rl.column is None:
-            if t.max_rows == 1:
-                return next(iter(t.rows.values()))
-            raise idlutils.RowNotFound(table=table, col='uuid', match=record)
-        row = idlutils.row_by_value(self, rl.table, rl.column, record)
-        if rl.uuid_column:
-            rows = getattr(row, rl.uuid_column)
-            if len(rows) != 1:
-                raise idlutils.RowNotFound(table=table, col='record',
-                                           match=record)
-            row = rows[0]
-        return row
+        return self._record_lookup(table, t)(t, record)
@@ -327,12 +327,13 @@ class DbFindCommand(ReadOnlyCommand):
         # reduce search space if we have any indexed column and '=' match
         rows = (idlutils.index_condition_match(self.table, *self.conditions) or
                 self.table.rows.values())
+        match = idlutils.compile_conditions(self.conditions)
         self.result = [
             rowview.RowView(r) if self.row else {
                 c: idlutils.get_column_value(r, c)
                 for c in self.columns
             }
-            for r in rows if idlutils.row_match(r, self.conditions)
+            for r in rows if match(r)
         ]
 
 
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import logging
 import os
 import queue
@@ -57,16 +58,28 @@ class TransactionQueue(queue.Queue, object):
         return self._wait_queue.alert_fileno
 
 
+def _batch_key(txn):
+    # pre_commit() is only run once for transactions committed together
+    if hasattr(txn, 'do_commit_batched'):
+        return (type(txn), id(txn.api))
+    return id(txn)
+
+
 class Connection(object):
+    # Maximum number of queued transactions committed together in batch mode
+    BATCH_SIZE = 100
 
-    def __init__(self, idl, timeout):
+    def __init__(self, idl, timeout, batch=False):
         """Create a connection to an OVSDB server using the OVS IDL
 
         :param timeout: The timeout value for OVSDB operations
         :param idl: A newly created ovs.db.Idl instance (run never called)
+        :param batch: Whether transactions queued at the same time should be
+                      committed as a single OVSDB transaction
         """
         self.timeout = timeout
-        self.txns = TransactionQueue(1)
+        self.batch = batch
+        self.txns = TransactionQueue(self.BATCH_SIZE if batch else 1)
         self.lock = threading.RLock()
         self.idl = idl
         self.thread = None
@@ -112,7 +125,9 @@ class Connection(object):
                 LOG.exception(e)
                 continue
             txn = self.txns.get_nowait()
-            if txn is not None:
+            if txn is not None and self.batch:
+                self._commit_batch(txn)
+            elif txn is not None:
                 try:
                     with self.lock:
                         txn.results.put(txn.do_commit())
@@ -123,6 +138,32 @@ class Connection(object):
                 self.txns.task_done()
         self.idl.close()
 
+    def _commit_batch(self, txn):
+        batch = [txn]
+        while len(batch) < self.BATCH_SIZE:
+            txn = self.txns.get_nowait()
+            if txn is None:
+                break
+            batch.append(txn)
+        # Only consecutive transactions of the same kind against the same API
+        # share an OVSDB transaction, so that they are committed in the order
+        # they were queued
+        for _key, txns in itertools.groupby(batch, key=_batch_key):
+            txns = list(txns)
+            try:
+                with self.lock:
+                    if len(txns) > 1:
+                        results = txns[0].do_commit_batched(txns[1:])
+                    else:
+                        results = [txns[0].do_commit()]
+            except Exception as ex:
+                er = idlutils.ExceptionResult(ex=ex,
+                                              tb=traceback.format_exc())
+                results = [er] * len(txns)
+            for txn, result in zip(txns, results):
+                txn.results.put(result)
+                self.txns.task_done()
+
     def stop(self, timeout=None):
         if not self.is_running:
             return True
@@ -29,20 +29,48 @@ class RowEvent(ovsdb_event.RowEvent):  # pylint: disable=abstract-method
         """
         return True
 
+    def _compiled(self, name):
+        # conditions/old_conditions may be reassigned or changed in place
+        # after __init__, so the compiled matcher is kept along with the
+        # object and the contents it was built from
+        conditions = getattr(self, name)
+        snapshot = tuple(conditions)
+        cache_name = '_compiled_' + name
+        cached = self.__dict__.get(cache_name)
+        if (cached is not None and cached[0] is conditions and
+                cached[1] == snapshot):
+            return cached[2]
+        match = idlutils.compile_conditions(snapshot)
+        self.__dict__[cache_name] = (conditions, snapshot, match)
+        return match
+
     def base_match(self, event, row, old):
-        if self.conditions and not idlutils.row_match(row, self.conditions):
+        if self.conditions and not self._compiled('conditions')(row):
             return False
         if self.old_conditions:
             if not old:
                 return False
             try:
-                if not idlutils.row_match(old, self.old_conditions):
+                if not self._compiled('old_conditions')(old):
                     return False
             except (KeyError, AttributeError):
                 # Its possible that old row may not have all columns in it
                 return False
         return True
 
+    def _index_keys(self):
+        # Unless overridden, matches() rejects other tables and event types
+        if type(self).matches is not RowEvent.matches:
+            return None
+        events = self.events
+        if isinstance(events, str):
+            # e.g. events=(ROW_UPDATE), which matches() tests as a substring
+            events = (events,)
+        try:
+            return frozenset((self.table, event) for event in events)
+        except TypeError:
+            return None
+
     def matches(self, event, row, old=None):
         if event not in self.events:
             return False
@@ -52,8 +80,11 @@ class RowEvent(ovsdb_event.RowEvent):  # pylint: disable=abstract-method
             return False
         if not self.match_fn(event, row, old):
             return False
-        LOG.debug("Matched %s: %r to row=%s old=%s", event.upper(), self,
-                  idlutils.row2str(row), idlutils.row2str(old) if old else '')
+        # row2str() is too expensive to call when the message is discarded
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("Matched %s: %r to row=%s old=%s", event.upper(), self,
+                      idlutils.row2str(row),
+                      idlutils.row2str(old) if old else '')
         return True
 
 
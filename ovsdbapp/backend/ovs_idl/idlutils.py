@@ -14,14 +14,17 @@
 
 import collections
 from collections import abc
+import functools
 # json is not deprecated
 # pylint: disable=deprecated-module
 import json
 import logging
+import operator
 import os
 import sys
 import time
 import uuid
+import weakref
 
 from ovs.db import idl
 from ovs import jsonrpc
@@ -50,7 +53,17 @@ _LOOKUP_TABLE = {
     'SSL': RowLookup('Open_vSwitch', None, 'ssl'),
 }
 
+# The effective RowLookup of every table in an Idl, see _prepare_lookup()
+_PREPARED_LOOKUPS = weakref.WeakKeyDictionary()
+# Per-Idl (change_seqno, {(table, column): {value: [rows]}}) maps used to
+# look up rows by a column that has no index, see _value_map()
+_VALUE_MAPS = weakref.WeakKeyDictionary()
+# Per-table {column: type.is_optional()} maps, see get_column_value()
+_OPTIONAL_COLUMNS = weakref.WeakKeyDictionary()
+
 _NO_DEFAULT = object()
+# Types that can never contain an api.Command, see db_replace_record()
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None), uuid.UUID))
 
 
 class RowNotFound(exceptions.OvsdbAppException):
@@ -96,12 +109,121 @@ def table_lookup(table, column, match):
     return next(table_lookup_all(table, column, match))
 
 
+def _txn_touches(idl_, tab):
+    """Return whether the open Idl transaction modified rows of the table"""
+    txn = getattr(idl_, 'txn', None)
+    if txn is None:
+        return False
+    txn_rows = getattr(txn, '_txn_rows', None)
+    if txn_rows is None:
+        return True
+    return any(row._table is tab for row in txn_rows.values())
+
+
+def _value_map(idl_, table, tab, column):
+    """Return a {value: [rows]} map of a table column
+
+    The map is built with a single pass over the table and reused until the
+    Idl change_seqno moves, i.e. until the Idl processes an update from the
+    server. None is returned if the map can't be used: the Idl has no
+    change_seqno (e.g. a Backend was passed), the column values aren't
+    hashable or the open transaction modified rows of the table.
+    """
+    maps = _seqno_maps(idl_, tab)
+    if maps is None:
+        return None
+    try:
+        return maps[(table, column)]
+    except KeyError:
+        pass
+    value_map = {}
+    try:
+        for row in tab.rows.values():
+            value_map.setdefault(getattr(row, column), []).append(row)
+    except TypeError:  # unhashable value, e.g. a set or map column
+        value_map = None
+    maps[(table, column)] = value_map
+    return value_map
+
+
+def _seqno_maps(idl_, tab):
+    """Return the maps of the Idl valid for its current change_seqno
+
+    None is returned if maps of the table can't be cached, see _value_map()
+    """
+    seqno = getattr(idl_, 'change_seqno', None)
+    if seqno is None or _txn_touches(idl_, tab):
+        return None
+    maps_seqno, maps = _VALUE_MAPS.get(idl_, (None, None))
+    if maps_seqno != seqno:
+        maps = {}
+        _VALUE_MAPS[idl_] = (seqno, maps)
+    return maps
+
+
+def _reference_map(idl_, table, tab, column):
+    """Return a {referenced row uuid: row} map of a reference set column
+
+    The map is cached like the ones of _value_map(). If several rows
+    reference the same row, the map holds the first of them.
+    """
+    maps = _seqno_maps(idl_, tab)
+    if maps is None:
+        return None
+    key = (table, column, 'references')
+    try:
+        return maps[key]
+    except KeyError:
+        pass
+    ref_map = {}
+    for row in tab.rows.values():
+        for ref in getattr(row, column):
+            ref_map.setdefault(ref.uuid, row)
+    maps[key] = ref_map
+    return ref_map
+
+
+def row_by_reference(idl_, table, column, ref):
+    """Return the row of table whose reference set column contains ref
+
+    :param idl_:   The Idl holding the tables
+    :type idl_:    ovs.db.idl.Idl
+    :param table:  The name of the table holding the references
+    :type table:   string
+    :param column: The reference set column, e.g. 'ports' for Bridge
+    :type column:  string
+    :param ref:    The referenced row
+    :type ref:     ovs.db.idl.Row
+    :returns:      The referencing row
+    :raises:       RowNotFound if no row references ref
+    """
+    tab = idl_.tables[table]
+    ref_map = _reference_map(idl_, table, tab, column)
+    if ref_map is not None:
+        try:
+            return ref_map[ref.uuid]
+        except KeyError:
+            pass
+    else:
+        for row in tab.rows.values():
+            if ref in getattr(row, column):
+                return row
+    raise RowNotFound(table=table, col=column, match=ref.uuid)
+
+
 def rows_by_value(idl_, table, column, match):
     """Lookup an IDL row in a table by column/value"""
     tab = idl_.tables[table]
     try:
         return index_lookup_all(tab, **{column: match})
     except KeyError:  # no index column
+        pass
+    value_map = _value_map(idl_, table, tab, column)
+    if value_map is None:
+        return table_lookup_all(tab, column, match)
+    try:
+        return iter(value_map.get(match, ()))
+    except TypeError:  # unhashable match
         return table_lookup_all(tab, column, match)
 
 
@@ -114,12 +236,64 @@ def row_by_value(idl_, table, column, match, default=_NO_DEFAULT):
     raise RowNotFound(table=table, col=column, match=match)
 
 
+def _prepare_lookup(idl_):
+    """Resolve the RowLookup used by row_by_record() for each Idl table
+
+    Tables that are not in _LOOKUP_TABLE fall back to their single-column
+    schema index, if any.
+    """
+    return {name: _LOOKUP_TABLE.get(name) or
+            RowLookup(name, get_index_column(t), None)
+            for name, t in idl_.tables.items()}
+
+
+def _row_lookup(idl_, table, t):
+    try:
+        lookups = _PREPARED_LOOKUPS[idl_]
+    except KeyError:
+        lookups = _PREPARED_LOOKUPS[idl_] = _prepare_lookup(idl_)
+    try:
+        return lookups[table]
+    except KeyError:
+        # The table was registered after the lookups were prepared, e.g. by
+        # OvsdbIdl.update_tables()
+        rl = lookups[table] = (_LOOKUP_TABLE.get(table) or
+                               RowLookup(table, get_index_column(t), None))
+        return rl
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_uuid_str(value):
+    # uuid.UUID() needs at least 32 hex digits, skip parsing names that are
+    # too short to be a UUID
+    if len(value) < 32:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+def _parse_uuid(record):
+    """Return record as a uuid.UUID, raising ValueError if it isn't one
+
+    Lookups are often retried with the same record, so the result of parsing
+    a string is cached.
+    """
+    if isinstance(record, str):
+        uuid_ = _parse_uuid_str(record)
+        if uuid_ is None:
+            raise ValueError("%s is not a UUID" % record)
+        return uuid_
+    return uuid.UUID(record)
+
+
 def row_by_record(idl_, table, record):
     t = idl_.tables[table]
     try:
         if isinstance(record, uuid.UUID):
             return t.rows[record]
-        uuid_ = uuid.UUID(record)
+        uuid_ = _parse_uuid(record)
         return t.rows[uuid_]
     except ValueError:
         # Not a UUID string, continue lookup by other means
@@ -136,10 +310,10 @@ def row_by_record(idl_, table, record):
             # a KeyError exception on Windows.
             raise RowNotFound(table=table, col='uuid', match=record) from e
 
-    rl = _LOOKUP_TABLE.get(table, RowLookup(table, get_index_column(t), None))
+    rl = _row_lookup(idl_, table, t)
     # no table means uuid only, no column means lookup table only has one row
     if rl.table is None:
-        raise ValueError("Table %s can only be queried by UUID") % table
+        raise ValueError("Table %s can only be queried by UUID" % table)
     if rl.column is None:
         return next(iter(t.rows.values()))
     row = row_by_value(idl_, rl.table, rl.column, record)
@@ -228,7 +402,13 @@ def parse_connection(connection_string):
     :param connection_string: The ovsdb-server connection string
     :type connection_string: string
     """
-    return [c.strip() for c in connection_string.split(',')]
+    # Return a new list so that callers can't modify the cached result
+    return list(_parse_connection(connection_string))
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_connection(connection_string):
+    return tuple(c.strip() for c in connection_string.split(','))
 
 
 def wait_for_change(_idl, timeout=None, seqno=None):
@@ -243,15 +423,22 @@ def wait_for_change(_idl, timeout=None, seqno=None):
         timeout = None
     if seqno is None:
         seqno = _idl.change_seqno
-    stop = time.time() + timeout if timeout else None
+    if timeout:
+        now = time.monotonic()
+        stop = now + timeout
+    else:
+        stop = None
+    # Poller.block() resets the poller, so it can be reused on each iteration
+    ovs_poller = poller.Poller()
     while _idl.change_seqno == seqno and not _idl.run():
-        ovs_poller = poller.Poller()
         _idl.wait(ovs_poller)
-        if timeout:
-            ovs_poller.timer_wait(timeout * 1000)
+        if stop:
+            ovs_poller.timer_wait((stop - now) * 1000)
         ovs_poller.block()
-        if stop and time.time() >= stop:
-            raise exceptions.TimeoutException()
+        if stop:
+            now = time.monotonic()
+            if now >= stop:
+                raise exceptions.TimeoutException()
 
 
 def get_column_value(row, col):
@@ -269,13 +456,27 @@ def get_column_value(row, col):
     if isinstance(val, list) and val:
         if isinstance(val[0], idl.Row):
             val = [v.uuid for v in val]
-        col_type = row._table.columns[col].type
         # ovs-vsctl treats lists of 1 as single results
-        if col_type.is_optional():
+        if _is_optional(row._table, col):
             val = val[0]
     return val
 
 
+def _is_optional(table, col):
+    try:
+        optional = _OPTIONAL_COLUMNS[table]
+    except KeyError:
+        optional = _OPTIONAL_COLUMNS.setdefault(table, {})
+    except TypeError:
+        # Not weakly referenceable, nothing to cache
+        return table.columns[col].type.is_optional()
+    try:
+        return optional[col]
+    except KeyError:
+        is_optional = optional[col] = table.columns[col].type.is_optional()
+        return is_optional
+
+
 def circular(*items):
     """Circularly iterate over the list of arguments"""
     if not items:
@@ -417,6 +618,101 @@ def condition_match(row, condition):
     return matched
 
 
+def _match_dict_eq(val, match):
+    return all(key in val and match[key] == val[key] for key in match)
+
+
+def _match_dict_ne(val, match):
+    return all(key in val and match[key] != val[key] for key in match)
+
+
+def _match_list_eq(val, match):
+    if not val or not match:
+        # Only equal if both are empty
+        return not val and not match
+    try:
+        return match.issubset(val)
+    except TypeError:
+        # unhashable values
+        return all(elem in val for elem in match)
+
+
+def _match_list_ne(val, match):
+    if not val or not match:
+        return bool(val or match)
+    try:
+        return match.isdisjoint(val)
+    except TypeError:
+        # unhashable values
+        return not any(elem in val for elem in match)
+
+
+_MATCH_FUNCTIONS = {
+    (dict, '='): _match_dict_eq,
+    (dict, '!='): _match_dict_ne,
+    (list, '='): _match_list_eq,
+    (list, '!='): _match_list_ne,
+    (None, '='): operator.eq,
+    (None, '!='): operator.ne,
+}
+
+
+def compile_condition(condition):
+    """Return a function testing whether a condition matches a row
+
+    The returned function behaves like condition_match(), but the operator
+    and match type dispatch is done once instead of for every row.
+
+    :param condition: A 3-tuple containing (column, operation, match)
+    """
+    col, op, match = condition
+    if isinstance(match, dict):
+        match_type = dict
+    elif isinstance(match, list):
+        match_type = list
+    else:
+        match_type = None
+    try:
+        compare = _MATCH_FUNCTIONS[(match_type, op)]
+        if match_type is list:
+            # Compared as a whole with the column value, see _match_list_eq
+            match = frozenset(match)
+    except (KeyError, TypeError):
+        compare = None
+    expected_type = type(condition[2])
+    is_str = isinstance(match, str)
+
+    def _condition_match(row):
+        val = get_column_value(row, col)
+        if (compare is None or (type(val) is not expected_type and
+                                not (is_str and isinstance(val, str)))):
+            # Let condition_match deal with type adjustments and errors
+            return condition_match(row, condition)
+        return compare(val, match)
+    return _condition_match
+
+
+def compile_conditions(conditions):
+    """Return a function testing whether a row matches all conditions
+
+    This should be preferred over row_match() when testing many rows
+    against the same conditions.
+
+    :param conditions: A list of 3-tuples containing (column, op, match)
+    """
+    compiled = tuple(compile_condition(cond) for cond in conditions)
+    # Avoid the extra call and loop for the common single condition case
+    if len(compiled) == 1:
+        return compiled[0]
+
+    def _row_match(row):
+        for match in compiled:
+            if not match(row):
+                return False
+        return True
+    return _row_match
+
+
 def row_match(row, conditions):
     """Return whether the row matches the list of conditions"""
     return all(condition_match(row, cond) for cond in conditions)
@@ -435,21 +731,27 @@ def db_replace_record(obj):
     This method should leave obj untouched unless the object contains an
     api.Command object.
     """
-    if isinstance(obj, abc.Mapping):
+    obj_type = type(obj)
+    # Most values are plain scalars, skip the more expensive ABC checks
+    if obj_type in _SCALAR_TYPES:
+        return obj
+    command_cls = api.Command
+    if obj_type is dict or (obj_type is not list and
+                            isinstance(obj, abc.Mapping)):
         for k, v in obj.items():
-            if isinstance(v, api.Command):
+            if isinstance(v, command_cls):
                 obj[k] = v.result
-    elif (isinstance(obj, abc.Sequence) and
-          not isinstance(obj, str)):
+    elif obj_type is list or (isinstance(obj, abc.Sequence) and
+                              not isinstance(obj, str)):
         for i, v in enumerate(obj):
-            if isinstance(v, api.Command):
+            if isinstance(v, command_cls):
                 try:
                     obj[i] = v.result
                 except TypeError:
                     # NOTE(twilson) If someone passes a tuple, then just return
                     # a tuple with the Commands replaced with their results
                     return type(obj)(getattr(v, "result", v) for v in obj)
-    elif isinstance(obj, api.Command):
+    elif isinstance(obj, command_cls):
         obj = obj.result
     return obj
 
@@ -461,8 +763,22 @@ def row2str(row):
     # we don't really want to deal with those, just what the Python values are.
     # Row foreign keys are printed as their UUID
     return "%s(%s)" % (row._table.name, ", ".join(
-        "%s=%s" % (col, idl._row_to_uuid(getattr(row, col)))
-        for col in row._table.columns if hasattr(row, col)))
+        "%s=%s" % (col, idl._row_to_uuid(val))
+        for col, val in _row_values(row)))
+
+
+def _row_values(row):
+    """Yield (column, value) for the columns a Row has a value for
+
+    Which columns are set is a property of the row, not of its table: the
+    old row passed to notify() and rows inserted by a transaction only hold
+    some of them. Each value is fetched once, as hasattr() followed by
+    getattr() would convert the underlying Datum twice.
+    """
+    for col in row._table.columns:
+        val = getattr(row, col, _NO_DEFAULT)
+        if val is not _NO_DEFAULT:
+            yield col, val
 
 
 def frozen_row(row):
@@ -478,7 +794,4 @@ def frozen_row(row):
     by using the same class that custom indexes use for searching. This
     should be safe to pass to other threads.
     """
-    return row._table.rows.IndexEntry(
-        uuid=row.uuid,
-        **{col: getattr(row, col)
-           for col in row._table.columns if hasattr(row, col)})
+    return row._table.rows.IndexEntry(uuid=row.uuid, **dict(_row_values(row)))
@@ -16,8 +16,10 @@ import os
 
 from ovsdbapp.backend.ovs_idl.common import base_connection_utils
 
+_ALERT_BYTE = b'X'
 
-class WaitQueue(base_connection_utils.WaitQueue):
+
+class PipeWaitQueue(base_connection_utils.WaitQueue):
     def init_alert_notification(self):
         alertpipe = os.pipe()
         # NOTE(ivasilevskaya) python 3 doesn't allow unbuffered I/O.
@@ -29,9 +31,30 @@ class WaitQueue(base_connection_utils.WaitQueue):
         self.alertin.read(1)
 
     def alert_notify(self):
-        self.alertout.write('X'.encode("latin-1"))
-        self.alertout.flush()
+        # alertout is unbuffered, so there is nothing to flush
+        self.alertout.write(_ALERT_BYTE)
 
     @property
     def alert_fileno(self):
         return self.alertin.fileno()
+
+
+class EventfdWaitQueue(base_connection_utils.WaitQueue):
+    def init_alert_notification(self):
+        # In semaphore mode every read decrements the counter by one, so each
+        # notification is consumed separately just like a byte in the pipe
+        self.alertfd = os.eventfd(0, os.EFD_SEMAPHORE)
+
+    def alert_notification_consume(self):
+        os.eventfd_read(self.alertfd)
+
+    def alert_notify(self):
+        os.eventfd_write(self.alertfd, 1)
+
+    @property
+    def alert_fileno(self):
+        return self.alertfd
+
+
+# os.eventfd is only available with Python >= 3.10
+WaitQueue = EventfdWaitQueue if hasattr(os, 'eventfd') else PipeWaitQueue
@@ -11,7 +11,57 @@
 #    under the License.
 
 
+import weakref
+
+# Per-table RowView subclasses, see _view_class()
+_VIEW_CLASSES = weakref.WeakKeyDictionary()
+
+
+class _Column(object):
+    """Forward reads of a column to the wrapped Row
+
+    This is a non-data descriptor, so like with RowView.__getattr__ a value
+    set on the view itself takes precedence over the Row's.
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return getattr(view._row, self.name)
+
+
+def _view_class(row):
+    # Reading a column through a descriptor is much cheaper than having the
+    # regular attribute lookup fail before falling back to __getattr__
+    table = getattr(row, '_table', None)
+    columns = getattr(table, 'columns', None)
+    if not isinstance(columns, dict):
+        return RowView
+    try:
+        return _VIEW_CLASSES[table]
+    except KeyError:
+        attrs = {name: _Column(name) for name in columns
+                 if not hasattr(RowView, name)}
+        # Named after the table so that views of different tables can be
+        # told apart, e.g. in reprs and tracebacks
+        cls_name = 'RowView_%s' % getattr(table, 'name', 'table')
+        return _VIEW_CLASSES.setdefault(table,
+                                        type(cls_name, (RowView,), attrs))
+    except TypeError:
+        # The table can't be weakly referenced
+        return RowView
+
+
 class RowView(object):
+    def __new__(cls, row):
+        if cls is RowView:
+            cls = _view_class(row)
+        return super().__new__(cls)
+
     def __init__(self, row):
         self._row = row
 
@@ -13,16 +13,21 @@
 #    under the License.
 
 import logging
+import operator
 import queue
 import time
+import traceback
 
 from ovs.db import idl
 
 from ovsdbapp import api
+from ovsdbapp.backend.ovs_idl import command as cmd
 from ovsdbapp.backend.ovs_idl import idlutils
 from ovsdbapp import exceptions
 
 LOG = logging.getLogger(__name__)
+_RESULT = operator.attrgetter('result')
+_NOOP_POST_COMMIT = cmd.BaseCommand.post_commit
 
 
 class Transaction(api.Transaction):
@@ -69,14 +74,24 @@ class Transaction(api.Transaction):
 
     def post_commit(self, txn):
         for command in self.commands:
-            command.post_commit(txn)
+            # Most commands inherit the no-op BaseCommand.post_commit(). This
+            # is checked for each call, post_commit() may have been patched.
+            post_commit = command.post_commit
+            if getattr(post_commit, '__func__', None) is not _NOOP_POST_COMMIT:
+                post_commit(txn)
 
     def do_commit(self):
         self.start_time = time.time()
+        return self._do_commit()
+
+    def _do_commit(self):
+        # Commit within the timeout counted from the current start_time
         attempts = 0
         if not self.commands:
             LOG.debug("There are no commands to commit")
             return []
+        # Avoid building the log arguments for every command when not needed
+        debug = LOG.isEnabledFor(logging.DEBUG)
         while True:
             if attempts > 0 and self.timeout_exceeded():
                 raise RuntimeError("OVS transaction timed out")
@@ -86,8 +101,10 @@ class Transaction(api.Transaction):
             txn = idl.Transaction(self.api.idl)
             self.pre_commit(txn)
             for i, command in enumerate(self.commands):
-                LOG.debug("Running txn n=%(n)d command(idx=%(idx)s): %(cmd)s",
-                          {'idx': i, 'cmd': command, 'n': attempts})
+                if debug:
+                    LOG.debug("Running txn n=%(n)d command(idx=%(idx)s): "
+                              "%(cmd)s",
+                              {'idx': i, 'cmd': command, 'n': attempts})
                 try:
                     command.run_idl(txn)
                 except Exception as e:
@@ -104,6 +121,10 @@ class Transaction(api.Transaction):
             status = txn.commit_block()
             if status == txn.TRY_AGAIN:
                 LOG.debug("OVSDB transaction returned TRY_AGAIN, retrying")
+                # do_commit() runs in the Connection thread, which is the only
+                # one running the Idl, so there is nobody else to signal the
+                # update: wait_for_change() has to process it itself. It
+                # returns right away if the update arrived with the reply.
                 idlutils.wait_for_change(self.api.idl, self.time_remaining(),
                                          seqno)
                 continue
@@ -132,7 +153,91 @@ class Transaction(api.Transaction):
             else:
                 LOG.debug("Transaction returned an unknown status: %s", status)
 
-            return [cmd.result for cmd in self.commands]
+            return self._results()
+
+    def do_commit_batched(self, other_txns):
+        """Commit this and other transactions as a single OVSDB transaction
+
+        The commands of all transactions are run, in order, in one
+        idl.Transaction so that they only cost one round-trip to ovsdb-server.
+        If the combined transaction does not succeed, each transaction is
+        committed on its own so that an error only affects the transaction
+        that caused it. All transactions share the same start time, so that
+        falling back to committing them one by one doesn't give each of them
+        a new timeout.
+
+        :param other_txns: Transactions to commit along with this one
+        :type other_txns:  list of Transaction
+        :returns: The result of each transaction, starting with this one
+        """
+        txns = [self] + list(other_txns)
+        results = self._commit_combined(txns)
+        if results is not None:
+            return results
+        LOG.debug("Batched transaction failed, committing %d transactions "
+                  "one by one", len(txns))
+        results = []
+        for t in txns:
+            try:
+                if t.timeout_exceeded():
+                    raise exceptions.TimeoutException(
+                        commands=t.commands, timeout=t.timeout,
+                        cause='Batched transaction timed out')
+                results.append(t._do_commit())
+            except Exception as ex:
+                results.append(idlutils.ExceptionResult(
+                    ex=ex, tb=traceback.format_exc()))
+        return results
+
+    def _commit_combined(self, txns):
+        """Return the results of txns, None if they could not be committed"""
+        start_time = time.time()
+        for t in txns:
+            t.start_time = start_time
+        attempts = 0
+        n_commands = sum(len(t.commands) for t in txns)
+        while not (attempts > 0 and self.timeout_exceeded()):
+            attempts += 1
+            seqno = self.api.idl.change_seqno
+            txn = idl.Transaction(self.api.idl)
+            self.pre_commit(txn)
+            LOG.debug("Running batched txn n=%(n)d with %(cmds)d commands",
+                      {'n': attempts, 'cmds': n_commands})
+            try:
+                for t in txns:
+                    t._run_batched(txn)
+            except Exception:
+                txn.abort()
+                return None
+            status = txn.commit_block()
+            if status == txn.TRY_AGAIN:
+                idlutils.wait_for_change(self.api.idl, self.time_remaining(),
+                                         seqno)
+                continue
+            if status == txn.SUCCESS:
+                return [t._post_commit_results(txn) for t in txns]
+            if status == txn.UNCHANGED:
+                return [t._results() for t in txns]
+            return None
+        return None
+
+    def _run_batched(self, txn):
+        """Run the commands in an idl.Transaction shared with others"""
+        for command in self.commands:
+            command.run_idl(txn)
+
+    def _post_commit_results(self, txn):
+        # The OVSDB transaction is already committed, an error raised by the
+        # post_commit() of a transaction batched with others must not turn
+        # their results into errors too
+        try:
+            self.post_commit(txn)
+        except Exception as ex:
+            return idlutils.ExceptionResult(ex=ex, tb=traceback.format_exc())
+        return self._results()
+
+    def _results(self):
+        return list(map(_RESULT, self.commands))
 
     def elapsed_time(self):
         return time.time() - self.start_time
@@ -43,6 +43,8 @@ _LOG_MAPPING = collections.OrderedDict((
     (DEBUG, vlog.Vlog.dbg),
 ))
 ALL_LEVELS = tuple(_LOG_MAPPING.keys())
+# Map local log LEVELS to the name of the OVS vlog function they replace
+_LOG_NAMES = {level: fn.__name__ for level, fn in _LOG_MAPPING.items()}
 
 
 def _original_vlog_fn(level):
@@ -52,7 +54,7 @@ def _original_vlog_fn(level):
 
 def _current_vlog_fn(level):
     """Get the currently used OVS vlog function mapped to level"""
-    return getattr(vlog.Vlog, _LOG_MAPPING[level].__name__)
+    return getattr(vlog.Vlog, _LOG_NAMES[level])
 
 
 def use_python_logger(levels=ALL_LEVELS, max_level=None):
@@ -80,13 +82,13 @@ def use_python_logger(levels=ALL_LEVELS, max_level=None):
     # NOTE(twilson) Replace functions directly instead of subclassing so that
     # debug messages contain the correct function/filename/line information
     for log in levels:
-        setattr(vlog.Vlog, _LOG_MAPPING[log].__name__, log)
+        setattr(vlog.Vlog, _LOG_NAMES[log], log)
 
 
 def reset_logger():
     """Reset the OVS vlog functions to their original values"""
-    for log in ALL_LEVELS:
-        setattr(vlog.Vlog, _LOG_MAPPING[log].__name__, _LOG_MAPPING[log])
+    for log, fn in _LOG_MAPPING.items():
+        setattr(vlog.Vlog, _LOG_NAMES[log], fn)
 
 
 def is_patched(level):
@@ -20,23 +20,28 @@ except ImportError:
     eventlet = None
 
 
-def avoid_blocking_call(f, *args, **kwargs):
-    """Ensure that the method "f" will not block other greenthreads.
+if eventlet is None:
+    def avoid_blocking_call(f, *args, **kwargs):
+        """Call the function "f" with arguments "args" and "kwargs"
 
-    Performs the call to the function "f" received as parameter in a
-    different thread using tpool.execute when called from a greenthread.
-    This will ensure that the function "f" will not block other greenthreads.
-    If not called from a greenthread, it will invoke the function "f" directly.
-    The function "f" will receive as parameters the arguments "args" and
-    keyword arguments "kwargs". If eventlet is not installed on the system
-    then this will call directly the function "f".
-    """
-    if eventlet is None:
+        eventlet is not installed on the system, so there is no greenthread
+        that calling "f" could block.
+        """
         return f(*args, **kwargs)
+else:
+    def avoid_blocking_call(f, *args, **kwargs):
+        """Ensure that the method "f" will not block other greenthreads.
 
-    # Note that eventlet.getcurrent will always return a greenlet object.
-    # In case of a greenthread, the parent greenlet will always be the hub
-    # loop greenlet.
-    if eventlet.getcurrent().parent:
-        return tpool.execute(f, *args, **kwargs)
-    return f(*args, **kwargs)
+        Performs the call to the function "f" received as parameter in a
+        different thread using tpool.execute when called from a greenthread.
+        This will ensure that the function "f" will not block other
+        greenthreads. If not called from a greenthread, it will invoke the
+        function "f" directly. The function "f" will receive as parameters
+        the arguments "args" and keyword arguments "kwargs".
+        """
+        # Note that eventlet.getcurrent will always return a greenlet object.
+        # In case of a greenthread, the parent greenlet will always be the hub
+        # loop greenlet.
+        if eventlet.getcurrent().parent:
+            return tpool.execute(f, *args, **kwargs)
+        return f(*args, **kwargs)
@@ -12,23 +12,21 @@
 
 import abc
 import atexit
+import bisect
 import itertools
 import logging
+import operator
 import queue
+import sys
 import threading
-
-# Several supported distros don't package sortedcontainers. For this reason
-# python-ovs, which requires it for indexing support, has an in-tree copy of
-# it. We already require sortedcontainers through python-ovs' dependency, so
-# to avoid issues with distro packaging, we don't add sortedcontainers as a
-# hard direct requirement of ovsdbapp, and use python-ovs' if it is missing.
-try:
-    import sortedcontainers
-except ImportError:
-    from ovs.compat import sortedcontainers
+import time
 
 LOG = logging.getLogger(__name__)
 STOP_EVENT = ("STOP", None, None, None)
+# Shared copies of the events tuples of RowEvents, there are only a few
+# distinct ones for however many events are watched
+_EVENTS = {}
+_PRIORITY = operator.attrgetter('priority')
 
 
 class RowEvent(object, metaclass=abc.ABCMeta):
@@ -36,6 +34,15 @@ class RowEvent(object, metaclass=abc.ABCMeta):
     ROW_UPDATE = "update"
     ROW_DELETE = "delete"
     ONETIME = False
+    # Whether run() is cheap and safe enough to be called right away by the
+    # thread notifying the change, instead of by a notify thread
+    INLINE_RUN = False
+    # Whether a change to a row matching the event while a previous match for
+    # the same row and event type is still waiting to be run only updates the
+    # pending run() instead of queueing another: it is passed the latest row
+    # and the updates merged by RowEventHandler.merge_updates(). ONETIME
+    # events are never coalesced.
+    COALESCE = False
     event_name = 'RowEvent'
     priority = 20
 
@@ -45,12 +52,46 @@ class RowEvent(object, metaclass=abc.ABCMeta):
         self.conditions = conditions
         self.old_conditions = old_conditions
 
+    # The key and its hash are cached, as events are hashed and compared
+    # whenever they are added to or removed from a RowEventHandler
+    _key = None
+    _hash = None
+
+    @property
+    def table(self):
+        return self._table
+
+    @table.setter
+    def table(self, value):
+        if type(value) is str:
+            value = sys.intern(value)
+        self._table = value
+        self._key = self._hash = None
+
+    @property
+    def events(self):
+        return self._events
+
+    @events.setter
+    def events(self, value):
+        if type(value) is tuple:
+            try:
+                value = _EVENTS.setdefault(value, value)
+            except TypeError:
+                pass
+        self._events = value
+        self._key = self._hash = None
+
     @property
     def key(self):
-        return (self.__class__, self.table, tuple(self.events))
+        if self._key is None:
+            self._key = (self.__class__, self.table, tuple(self.events))
+        return self._key
 
     def __hash__(self):
-        return hash(self.key)
+        if self._hash is None:
+            self._hash = hash(self.key)
+        return self._hash
 
     def __eq__(self, other):
         try:
@@ -63,6 +104,15 @@ class RowEvent(object, metaclass=abc.ABCMeta):
     def __ne__(self, other):
         return not self == other
 
+    def _index_keys(self):
+        """Return the (table, event) pairs this event can possibly match
+
+        RowEventHandler only tests an event against changes in these pairs.
+        None, the default, means the event must be tested against all changes
+        as matches() may use any criteria.
+        """
+        return None
+
     def __repr__(self):
         return ("%s(events=%r, table=%r, conditions=%r, old_conditions=%r), "
                 "priority=%d" %
@@ -89,8 +139,17 @@ class RowEvent(object, metaclass=abc.ABCMeta):
 class WaitEvent(RowEvent):
     event_name = 'WaitEvent'
     ONETIME = True
+    # Setting a threading.Event doesn't need to wait for the notify thread
+    INLINE_RUN = True
     priority = 10
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # An overridden run() may do anything, e.g. run OVSDB commands that
+        # would deadlock in the thread notifying the change
+        if 'INLINE_RUN' not in cls.__dict__:
+            cls.INLINE_RUN = cls.run is WaitEvent.run
+
     def __init__(self, *args, **kwargs):
         self.event = threading.Event()
         self.timeout = kwargs.pop('timeout', None)
@@ -107,31 +166,186 @@ class WaitEvent(RowEvent):
         return self.event.wait(self.timeout)
 
 
+class NotificationQueue(queue.Queue):
+    """A Queue that can hand out and complete queued items in batches"""
+
+    def get_batch(self, max_items):
+        """Wait for an item and return it along with those already queued
+
+        :param max_items: The maximum number of items to return
+        :type max_items:  int
+        :returns:         list of items
+        """
+        with self.not_empty:
+            while not self._qsize():
+                self.not_empty.wait()
+            batch = []
+            while self._qsize() and len(batch) < max_items:
+                batch.append(self._get())
+            self.not_full.notify(len(batch))
+            return batch
+
+    def put_many(self, items):
+        """Put all items in an unbounded queue at once"""
+        if self.maxsize > 0:
+            raise ValueError('put_many() requires an unbounded queue')
+        with self.not_empty:
+            for item in items:
+                self._put(item)
+            self.unfinished_tasks += len(items)
+            self.not_empty.notify(len(items))
+
+    def put_unbounded(self, item):
+        """Put an item without blocking, even if the queue is full"""
+        with self.not_empty:
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def tasks_done(self, count):
+        """Indicate that `count` formerly enqueued tasks are complete
+
+        This is equivalent to calling task_done() `count` times.
+        """
+        with self.all_tasks_done:
+            unfinished = self.unfinished_tasks - count
+            if unfinished <= 0:
+                if unfinished < 0:
+                    raise ValueError('task_done() called too many times')
+                self.all_tasks_done.notify_all()
+            self.unfinished_tasks = unfinished
+
+
 class RowEventHandler(object):
-    def __init__(self):
-        self._queues = sortedcontainers.SortedDict(lambda p: -p)
+    # Maximum number of queued notifications processed by notify_loop before
+    # unwatching the ONETIME events that ran
+    NOTIFY_BATCH_SIZE = 128
+    # Number of events matched between yields to other (green)threads
+    MATCH_YIELD_INTERVAL = 64
+
+    def __init__(self, workers=1, max_pending=0):
+        """Watch for events and run the matching ones in notify threads
+
+        :param workers:     The number of threads running matched events.
+                            Events are run in the order they were matched only
+                            when there is a single worker.
+        :type workers:      int
+        :param max_pending: The maximum number of matched events waiting to
+                            be run, 0 for no limit. When the limit is reached,
+                            notify() drops the event right away and counts it
+                            in `dropped`.
+        :type max_pending:  int
+        """
+        # Number of matched events dropped because max_pending was reached
+        self.dropped = 0
+        # priority -> watched events, and the negated priorities in order
+        self._queues = {}
+        self._priority_keys = []
         self._lock = threading.Lock()
-        self.notifications = queue.Queue()
-        self.notify_thread = threading.Thread(target=self.notify_loop)
-        self.notify_thread.daemon = True
+        # All watched events in priority order, rebuilt after any change
+        self._flat_watched = None
+        # (table, event) -> watched events that can match it, the watched
+        # events that may match anything, and the index keys of each event
+        self._indexed = {}
+        self._unindexed = set()
+        self._event_keys = {}
+        # Priority ordered (watched event, bound matches()) pairs to test for
+        # a (table, event) pair, dropped when an event of the pair changes
+        self._candidates = {}
+        self.notifications = NotificationQueue(max_pending)
+        # (id(match), row uuid, event) -> latest (row, updates) of queued
+        # notifications for COALESCE events
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        # Daemon threads, unlike those of a ThreadPoolExecutor, don't have to
+        # be joined before the interpreter can exit
+        self.notify_threads = []
+        for _ in range(max(1, workers)):
+            thread = threading.Thread(target=self.notify_loop)
+            thread.daemon = True
+            self.notify_threads.append(thread)
+        self.notify_thread = self.notify_threads[0]
         atexit.register(self.shutdown)
         self.start()
 
     def start(self):
-        self.notify_thread.start()
+        for thread in self.notify_threads:
+            thread.start()
 
     def _get_queue(self, event):
-        return self._queues.setdefault(event.priority, set())
+        try:
+            return self._queues[event.priority]
+        except KeyError:
+            bisect.insort(self._priority_keys, -event.priority)
+            return self._queues.setdefault(event.priority, set())
 
     @property
     def _watched_events(self):
-        return itertools.chain(*self._queues.values())
+        if self._flat_watched is None:
+            self._flat_watched = tuple(itertools.chain.from_iterable(
+                self._queues[-key] for key in self._priority_keys))
+        return self._flat_watched
+
+    @staticmethod
+    def _event_index_keys(event):
+        index_keys = getattr(event, '_index_keys', None)
+        keys = index_keys() if index_keys else None
+        if keys is None:
+            return None
+        try:
+            return frozenset(keys)
+        except TypeError:
+            return None
 
     def _add(self, event):
-        self._get_queue(event).add(event)
+        events = self._get_queue(event)
+        if event in events:
+            return
+        events.add(event)
+        self._flat_watched = None
+        keys = self._event_keys[event] = self._event_index_keys(event)
+        if keys is None:
+            self._unindexed.add(event)
+            self._candidates.clear()
+            return
+        for key in keys:
+            self._indexed.setdefault(key, set()).add(event)
+            self._candidates.pop(key, None)
 
     def _discard(self, event):
-        self._get_queue(event).discard(event)
+        events = self._queues.get(event.priority)
+        if events is None or event not in events:
+            return
+        events.discard(event)
+        if not events:
+            del self._queues[event.priority]
+            self._priority_keys.remove(-event.priority)
+        self._flat_watched = None
+        keys = self._event_keys.pop(event, None)
+        if keys is None:
+            self._unindexed.discard(event)
+            self._candidates.clear()
+            return
+        for key in keys:
+            indexed = self._indexed[key]
+            indexed.discard(event)
+            if not indexed:
+                del self._indexed[key]
+            self._candidates.pop(key, None)
+
+    def _get_candidates(self, table, event):
+        key = (table, event)
+        try:
+            return self._candidates[key]
+        except KeyError:
+            pass
+        events = list(self._indexed.get(key, ()))
+        events.extend(self._unindexed)
+        # Like _watched_events, from the highest to the lowest priority
+        events.sort(key=_PRIORITY, reverse=True)
+        candidates = self._candidates[key] = tuple(
+            (candidate, candidate.matches) for candidate in events)
+        return candidates
 
     @staticmethod
     def match(candidate, event, row, updates):
@@ -142,9 +356,31 @@ class RowEventHandler(object):
             return False
 
     def matching_events(self, event, row, updates):
+        table = getattr(getattr(row, '_table', None), 'name', None)
+        # The candidates are an immutable snapshot, so the (possibly slow)
+        # matches() calls don't need to block watch/unwatch calls
         with self._lock:
-            return tuple(t for t in self._watched_events
-                         if self.match(t, event, row, updates))
+            candidates = self._get_candidates(table, event)
+        # Unless a subclass changed how events are matched, call the bound
+        # matches() methods directly instead of going through match()
+        custom_match = self.match is not RowEventHandler.match
+        matching = []
+        for i, (candidate, matches) in enumerate(candidates, 1):
+            if custom_match:
+                matched = self.match(candidate, event, row, updates)
+            else:
+                try:
+                    matched = matches(event, row, updates)
+                except Exception:
+                    LOG.exception("Event not matched due to this exception:\n")
+                    matched = False
+            if matched:
+                matching.append(candidate)
+            if not i % self.MATCH_YIELD_INTERVAL:
+                # Like OvsdbIdl.cooperative_yield(), let eventlet switch to
+                # other greenthreads when monkey patched
+                time.sleep(0)
+        return tuple(matching)
 
     def watch_event(self, event):
         with self._lock:
@@ -164,24 +400,104 @@ class RowEventHandler(object):
             for event in events:
                 self._discard(event)
 
+    def pending(self):
+        """Return the approximate number of matched events waiting to run"""
+        return self.notifications.qsize()
+
+    def _put(self, notification):
+        # notify() is called by the thread running the Idl, which must not
+        # wait for the notify threads to make room in the queue
+        try:
+            self.notifications.put_nowait(notification)
+        except queue.Full:
+            self.dropped += 1
+            LOG.warning("Dropping notification %s, %d events are already "
+                        "waiting to be run (%d dropped so far)", notification,
+                        self.notifications.maxsize, self.dropped)
+            return False
+        return True
+
+    @staticmethod
+    def _coalesce_key(match, event, row):
+        if getattr(match, 'COALESCE', False) is not True or match.ONETIME:
+            return None
+        uuid = getattr(row, 'uuid', None)
+        if uuid is None:
+            return None
+        # The queued notification keeps match alive, so its id is not reused
+        return (id(match), uuid, event)
+
+    def merge_updates(self, first, later):
+        """Return the updates of two changes coalesced into one run()
+
+        Dictionaries of changes are merged, keeping the earliest value of
+        each key, i.e. the value before the coalesced changes. Otherwise the
+        updates of the first change are kept.
+        """
+        if isinstance(first, dict) and isinstance(later, dict):
+            merged = dict(later)
+            merged.update(first)
+            return merged
+        return first
+
+    def _coalesce(self, key, row, updates):
+        """Return whether the change has to be queued to be run"""
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = (row, updates)
+                return True
+            self._pending[key] = (row, self.merge_updates(pending[1], updates))
+            return False
+
+    def _pop_coalesced(self, key, row, updates):
+        with self._pending_lock:
+            return self._pending.pop(key, (row, updates))
+
     def shutdown(self):
-        self.notifications.put(STOP_EVENT)
+        # One stop request for each notify thread, which each consume one.
+        # Stopping must not depend on room being left in a bounded queue.
+        for _ in self.notify_threads:
+            self.notifications.put_unbounded(STOP_EVENT)
+
+    def _get_notifications(self):
+        """Wait for notifications and return all of those already queued"""
+        return self.notifications.get_batch(self.NOTIFY_BATCH_SIZE)
 
     def notify_loop(self):
         while True:
-            try:
-                match, event, row, updates = self.notifications.get()
-                if (match, event, row, updates) == STOP_EVENT:
-                    self.notifications.task_done()
-                    break
-                match.run(event, row, updates)
-                if match.ONETIME:
-                    self.unwatch_event(match)
-                self.notifications.task_done()
-            except Exception:
-                # If any unexpected exception happens we don't want the
-                # notify_loop to exit.
-                LOG.exception('Unexpected exception in notify_loop')
+            batch = self._get_notifications()
+            onetime = []
+            stops = 0
+            for notification in batch:
+                try:
+                    if notification == STOP_EVENT:
+                        stops += 1
+                        continue
+                    if stops:
+                        # Queued after the stop request, it is not run
+                        continue
+                    match, event, row, updates = notification
+                    key = self._coalesce_key(match, event, row)
+                    if key is not None:
+                        row, updates = self._pop_coalesced(key, row, updates)
+                    match.run(event, row, updates)
+                    if match.ONETIME:
+                        onetime.append(match)
+                except Exception:
+                    # If any unexpected exception happens we don't want the
+                    # notify_loop to exit.
+                    LOG.exception('Unexpected exception in notify_loop')
+            # Leave the stop requests of the other workers to them
+            for _ in range(stops - 1):
+                self.notifications.put_unbounded(STOP_EVENT)
+            # Unwatched before the batch is done, so that a join() of the
+            # queue doesn't return while one-time events are still watched
+            if onetime:
+                self.unwatch_events(onetime)
+            self.notifications.tasks_done(len(batch))
+            if stops:
+                break
 
     def notify(self, event, row, updates=None):
         """Method for calling backend to call for each DB update
@@ -197,5 +513,31 @@ class RowEventHandler(object):
         """
         matching = self.matching_events(
             event, row, updates)
+        # Queued in the priority order of matching, coalesced events included
+        notifications = []
         for match in matching:
-            self.notifications.put((match, event, row, updates))
+            if getattr(match, 'INLINE_RUN', False) is True:
+                self._run_inline(match, event, row, updates)
+                continue
+            key = self._coalesce_key(match, event, row)
+            if key is None or self._coalesce(key, row, updates):
+                notifications.append((match, event, row, updates))
+        if len(notifications) > 1 and not self.notifications.maxsize:
+            # Queue all the events matching the change with a single lock
+            # acquisition, they are still run in order
+            self.notifications.put_many(notifications)
+            return
+        for notification in notifications:
+            if not self._put(notification):
+                key = self._coalesce_key(*notification[:3])
+                if key is not None:
+                    with self._pending_lock:
+                        self._pending.pop(key, None)
+
+    def _run_inline(self, match, event, row, updates):
+        try:
+            match.run(event, row, updates)
+        except Exception:
+            LOG.exception('Unexpected exception running %r', match)
+        if match.ONETIME:
+            self.unwatch_event(match)
@@ -24,13 +24,14 @@ class OvsdbAppException(RuntimeError):
 
     def __init__(self, **kwargs):
         try:
-            super().__init__(self.message % kwargs)
-            self.msg = self.message % kwargs
+            msg = self.message % kwargs
         except Exception:
             if self.use_fatal_exceptions():
                 raise
             # at least get the core message out if something happened
-            super().__init__(self.message)
+            msg = self.message
+        self.msg = msg
+        super().__init__(msg)
 
     def __str__(self):
         return self.msg
@@ -21,6 +21,14 @@ class API(api.API, metaclass=abc.ABCMeta):
     This API basically mirrors the vtep-ctl operations with these changes:
     1. Methods that create objects will return a read-only view of the object
     2. Methods which list objects will return a list of read-only view objects
+
+    Like with vtep-ctl commands chained with "--", the commands returned by
+    this API can be added to a single transaction() to be sent to the OVSDB
+    server in one request, e.g.:
+
+        with api.transaction(check_error=True) as txn:
+            txn.add(api.add_ps('ps1'))
+            txn.add(api.add_port('ps1', 'port1'))
     """
 
     @abc.abstractmethod
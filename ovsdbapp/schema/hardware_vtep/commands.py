@@ -22,15 +22,29 @@ class TableGlobalIsEmpty(idlutils.RowNotFound):
 def get_global_record(api):
     # there should be only one record in 'Global' table
     try:
-        return next((r for r in api.tables['Global'].rows.values()))
+        return next(iter(api.tables['Global'].rows.values()))
     except StopIteration as e:
         raise TableGlobalIsEmpty from e
 
 
+def _get_port(api, pswitch, name):
+    ports = pswitch.ports
+    try:
+        # Physical_Port names are only unique within a switch
+        for port in idlutils.index_lookup_all(api.tables['Physical_Port'],
+                                              name=name):
+            if port in ports:
+                return port
+    except (KeyError, AttributeError):  # no name index
+        pass
+    # Ports inserted by the current transaction are not indexed yet
+    return next((p for p in ports if p.name == name), None)
+
+
 class _ListCommand(cmd.ReadOnlyCommand):
     def run_idl(self, txn):
         table = self.api.tables[self.table_name]
-        self.result = [rowview.RowView(r) for r in table.rows.values()]
+        self.result = list(map(rowview.RowView, table.rows.values()))
 
 
 class AddPsCommand(cmd.AddCommand):
@@ -54,7 +68,8 @@ class AddPsCommand(cmd.AddCommand):
             raise RuntimeError(msg)
         pswitch = txn.insert(self.api.tables[self.table_name])
         pswitch.name = self.pswitch
-        self.set_columns(pswitch, **self.columns)
+        if self.columns:
+            self.set_columns(pswitch, **self.columns)
         config.addvalue('switches', pswitch)
         self.result = pswitch.uuid
 
@@ -100,8 +115,7 @@ class AddPortCommand(cmd.AddCommand):
 
     def run_idl(self, txn):
         pswitch = self.api.lookup('Physical_Switch', self.pswitch)
-        port = next((p for p in pswitch.ports
-                     if idlutils.row_match(p, self.conditions)), None)
+        port = _get_port(self.api, pswitch, self.port)
         if port:
             if self.may_exist:
                 self.result = rowview.RowView(port)
@@ -126,8 +140,7 @@ class DelPortCommand(cmd.BaseCommand):
 
     def run_idl(self, txn):
         pswitch = self.api.lookup('Physical_Switch', self.pswitch)
-        port = next((p for p in pswitch.ports
-                     if idlutils.row_match(p, self.conditions)), None)
+        port = _get_port(self.api, pswitch, self.port)
         if not port:
             if self.if_exists:
                 return
@@ -147,7 +160,7 @@ class ListPortsCommand(cmd.ReadOnlyCommand):
 
     def run_idl(self, txn):
         pswitch = self.api.lookup(self.table_name, self.pswitch)
-        self.result = [rowview.RowView(port) for port in pswitch.ports]
+        self.result = list(map(rowview.RowView, pswitch.ports))
 
 
 class GetPortCommand(cmd.BaseGetRowCommand):
@@ -174,7 +187,8 @@ class AddLsCommand(cmd.AddCommand):
             raise RuntimeError(msg)
         switch = txn.insert(self.api.tables[self.table_name])
         switch.name = self.switch
-        self.set_columns(switch, **self.columns)
+        if self.columns:
+            self.set_columns(switch, **self.columns)
         self.result = switch.uuid
 
 
@@ -219,8 +233,7 @@ class BindLsCommand(cmd.BaseCommand):
     def run_idl(self, txn):
         pswitch = self.api.lookup('Physical_Switch', self.pswitch)
         switch = self.api.lookup('Logical_Switch', self.switch)
-        port = next((p for p in pswitch.ports
-                     if idlutils.row_match(p, self.conditions)), None)
+        port = _get_port(self.api, pswitch, self.port)
         if not port:
             raise idlutils.RowNotFound(table=self.table_name,
                                        col='name', match=self.port)
@@ -239,8 +252,7 @@ class UnbindLsCommand(cmd.BaseCommand):
 
     def run_idl(self, txn):
         pswitch = self.api.lookup('Physical_Switch', self.pswitch)
-        port = next((p for p in pswitch.ports
-                     if idlutils.row_match(p, self.conditions)), None)
+        port = _get_port(self.api, pswitch, self.port)
         if not port:
             raise idlutils.RowNotFound(table=self.table_name,
                                        col='name', match=self.port)
@@ -254,22 +266,19 @@ class _ClearMacsCommand(cmd.BaseCommand):
 
     def run_idl(self, txn):
         switch = self.api.lookup('Logical_Switch', self.switch)
-        macs = []
-
         for table_name in self.table_names:
-            macs.extend(idlutils.rows_by_value(self.api.idl,
-                                               table_name,
-                                               'logical_switch', switch))
-        for mac in macs:
-            mac.delete()
+            # Don't delete rows while iterating over an index of their table
+            for mac in tuple(idlutils.rows_by_value(self.api.idl, table_name,
+                                                    'logical_switch', switch)):
+                mac.delete()
 
 
 class ClearLocalMacsCommand(_ClearMacsCommand):
-    table_names = ['Ucast_Macs_Local', 'Mcast_Macs_Local']
+    table_names = ('Ucast_Macs_Local', 'Mcast_Macs_Local')
 
 
 class ClearRemoteMacsCommand(_ClearMacsCommand):
-    table_names = ['Ucast_Macs_Remote', 'Mcast_Macs_Remote']
+    table_names = ('Ucast_Macs_Remote', 'Mcast_Macs_Remote')
 
 
 class _ListMacsCommand(cmd.ReadOnlyCommand):
@@ -279,18 +288,16 @@ class _ListMacsCommand(cmd.ReadOnlyCommand):
 
     def run_idl(self, txn):
         switch = self.api.lookup('Logical_Switch', self.switch)
-        self.result = []
-
-        for table_name in self.table_names:
-            self.result.append([rowview.RowView(mac)
-                                for mac in idlutils.rows_by_value(
-                                    self.api.idl, table_name,
-                                    'logical_switch', switch)])
+        idl = self.api.idl
+        self.result = [
+            list(map(rowview.RowView, idlutils.rows_by_value(
+                idl, table_name, 'logical_switch', switch)))
+            for table_name in self.table_names]
 
 
 class ListLocalMacsCommand(_ListMacsCommand):
-    table_names = ['Ucast_Macs_Local', 'Mcast_Macs_Local']
+    table_names = ('Ucast_Macs_Local', 'Mcast_Macs_Local')
 
 
 class ListRemoteMacsCommand(_ListMacsCommand):
-    table_names = ['Ucast_Macs_Remote', 'Mcast_Macs_Remote']
+    table_names = ('Ucast_Macs_Remote', 'Mcast_Macs_Remote')
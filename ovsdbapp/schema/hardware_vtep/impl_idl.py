@@ -10,11 +10,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import logging
+
 from ovsdbapp.backend import ovs_idl
 from ovsdbapp.backend.ovs_idl import idlutils
 from ovsdbapp.schema.hardware_vtep import api
 from ovsdbapp.schema.hardware_vtep import commands as cmd
 
+LOG = logging.getLogger(__name__)
+
 
 class HwVtepApiIdlImpl(ovs_idl.Backend, api.API):
     schema = 'hardware_vtep'
@@ -30,6 +34,21 @@ class HwVtepApiIdlImpl(ovs_idl.Backend, api.API):
         'Mcast_Macs_Remote': idlutils.RowLookup('Mcast_Macs_Remote',
                                                 None, None),
     }
+    # Tables whose rows are listed and cleared by logical switch
+    mac_tables = ('Ucast_Macs_Local', 'Mcast_Macs_Local',
+                  'Ucast_Macs_Remote', 'Mcast_Macs_Remote')
+
+    def autocreate_indices(self):
+        super().autocreate_indices()
+        # Index the MACs by logical switch so that rows_by_value() doesn't
+        # have to scan the MACs of all switches
+        for table in self.mac_tables:
+            if table not in self.idl.tables:
+                continue
+            try:
+                self.create_index(table, 'logical_switch')
+            except ValueError:
+                LOG.debug("logical_switch index of %s already exists", table)
 
     def add_ps(self, pswitch, may_exist=False, **columns):
         return cmd.AddPsCommand(self, pswitch, may_exist, **columns)
@@ -14,12 +14,16 @@
 
 import logging
 
+from ovs.db import idl
+
 from ovsdbapp.backend.ovs_idl import command
 from ovsdbapp.backend.ovs_idl import idlutils
 
 LOG = logging.getLogger(__name__)
 
 BaseCommand = command.BaseCommand
+# Row.addvalue()/delvalue()/setkey() were added in OVS 2.6, check only once
+_HAS_MUTATE = hasattr(idl.Row, 'addvalue')
 
 
 class AddManagerCommand(command.AddCommand):
@@ -32,9 +36,9 @@ class AddManagerCommand(command.AddCommand):
     def run_idl(self, txn):
         row = txn.insert(self.api._tables['Manager'])
         row.target = self.target
-        try:
+        if _HAS_MUTATE:
             self.api._ovs.addvalue('manager_options', row)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             self.api._ovs.verify('manager_options')
             self.api._ovs.manager_options = (
                 self.api._ovs.manager_options + [row])
@@ -63,9 +67,9 @@ class RemoveManagerCommand(BaseCommand):
             msg = "Manager with target %s does not exist" % self.target
             LOG.error(msg)
             raise RuntimeError(msg) from e
-        try:
+        if _HAS_MUTATE:
             self.api._ovs.delvalue('manager_options', manager)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             self.api._ovs.verify('manager_options')
             manager_list = self.api._ovs.manager_options
             manager_list.remove(manager)
@@ -95,14 +99,15 @@ class AddBridgeCommand(command.AddCommand):
         row.name = self.name
         if self.datapath_type:
             row.datapath_type = self.datapath_type
-        try:
+        if _HAS_MUTATE:
             self.api._ovs.addvalue('bridges', row)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             self.api._ovs.verify('bridges')
             self.api._ovs.bridges = self.api._ovs.bridges + [row]
 
         # Add the internal bridge port
-        cmd = AddPortCommand(self.api, self.name, self.name, self.may_exist)
+        cmd = AddPortCommand(self.api, self.name, self.name, self.may_exist,
+                             bridge_row=row)
         cmd.run_idl(txn)
 
         cmd = command.DbSetCommand(self.api, 'Interface', self.name,
@@ -133,9 +138,9 @@ class DelBridgeCommand(BaseCommand):
             for interface in port.interfaces:
                 interface.delete()
             port.delete()
-        try:
+        if _HAS_MUTATE:
             self.api._ovs.delvalue('bridges', br)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             self.api._ovs.verify('bridges')
             bridges = self.api._ovs.bridges
             bridges.remove(br)
@@ -214,15 +219,21 @@ class SetFailModeCommand(BaseCommand):
 class AddPortCommand(command.AddCommand):
     table_name = 'Port'
 
-    def __init__(self, api, bridge, port, may_exist, **interface_attrs):
+    def __init__(self, api, bridge, port, may_exist, bridge_row=None,
+                 **interface_attrs):
         super().__init__(api)
         self.bridge = bridge
         self.port = port
         self.may_exist = may_exist
+        # Set by AddBridgeCommand, which already has the row of the bridge
+        self.bridge_row = bridge_row
         self.interface_attrs = interface_attrs
 
     def run_idl(self, txn):
-        br = idlutils.row_by_value(self.api.idl, 'Bridge', 'name', self.bridge)
+        br = self.bridge_row
+        if br is None:
+            br = idlutils.row_by_value(self.api.idl, 'Bridge', 'name',
+                                       self.bridge)
         if self.may_exist:
             port = idlutils.row_by_value(self.api.idl, 'Port', 'name',
                                          self.port, None)
@@ -231,9 +242,9 @@ class AddPortCommand(command.AddCommand):
                 return
         port = txn.insert(self.api._tables['Port'])
         port.name = self.port
-        try:
+        if _HAS_MUTATE:
             br.addvalue('ports', port)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             br.verify('ports')
             ports = getattr(br, 'ports', [])
             ports.append(port)
@@ -280,9 +291,9 @@ class DelPortCommand(BaseCommand):
             LOG.error(msg)
             raise RuntimeError(msg)
 
-        try:
+        if _HAS_MUTATE:
             br.delvalue('ports', port)
-        except AttributeError:  # OVS < 2.6
+        else:  # OVS < 2.6
             br.verify('ports')
             ports = br.ports
             ports.remove(port)
@@ -301,7 +312,9 @@ class ListPortsCommand(command.ReadOnlyCommand):
 
     def run_idl(self, txn):
         br = idlutils.row_by_value(self.api.idl, 'Bridge', 'name', self.bridge)
-        self.result = [p.name for p in br.ports if p.name != self.bridge]
+        # Reading a Row column converts its datum, only do it once per port
+        names = (p.name for p in br.ports)
+        self.result = [name for name in names if name != self.bridge]
 
 
 class ListIfacesCommand(command.ReadOnlyCommand):
@@ -321,14 +334,9 @@ class PortToBridgeCommand(command.ReadOnlyCommand):
         self.name = name
 
     def run_idl(self, txn):
-        # TODO(twilson) This is expensive!
-        # This traversal of all ports could be eliminated by caching the bridge
-        # name on the Port's external_id field
-        # In fact, if we did that, the only place that uses to_br functions
-        # could just add the external_id field to the conditions passed to find
         port = idlutils.row_by_value(self.api.idl, 'Port', 'name', self.name)
-        bridges = self.api._tables['Bridge'].rows.values()
-        self.result = next(br.name for br in bridges if port in br.ports)
+        self.result = idlutils.row_by_reference(self.api.idl, 'Bridge',
+                                                'ports', port).name
 
 
 class InterfaceToBridgeCommand(command.ReadOnlyCommand):
@@ -339,12 +347,10 @@ class InterfaceToBridgeCommand(command.ReadOnlyCommand):
     def run_idl(self, txn):
         interface = idlutils.row_by_value(self.api.idl, 'Interface', 'name',
                                           self.name)
-        ports = self.api._tables['Port'].rows.values()
-        pname = next(
-            port for port in ports if interface in port.interfaces)
-
-        bridges = self.api._tables['Bridge'].rows.values()
-        self.result = next(br.name for br in bridges if pname in br.ports)
+        port = idlutils.row_by_reference(self.api.idl, 'Port', 'interfaces',
+                                         interface)
+        self.result = idlutils.row_by_reference(self.api.idl, 'Bridge',
+                                                'ports', port).name
 
 
 class GetExternalIdCommand(command.ReadOnlyCommand):
@@ -371,9 +377,12 @@ class SetExternalIdCommand(BaseCommand):
     def run_idl(self, txn):
         row = idlutils.row_by_value(
             self.api.idl, self.table, 'name', self.name)
-        external_ids = getattr(row, 'external_ids', {})
-        external_ids[self.field] = self.value
-        row.external_ids = external_ids
+        if _HAS_MUTATE:
+            row.setkey('external_ids', self.field, self.value)
+        else:  # OVS < 2.6
+            external_ids = getattr(row, 'external_ids', {})
+            external_ids[self.field] = self.value
+            row.external_ids = external_ids
 
 
 class BrGetExternalIdCommand(GetExternalIdCommand):
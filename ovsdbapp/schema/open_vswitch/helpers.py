@@ -12,16 +12,20 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import logging
+import os
 import subprocess
 
 LOG = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=256)
 def _connection_to_manager_uri(conn_uri):
-    proto, addr = conn_uri.split(':', 1)
-    if ':' in addr:
-        ip, port = addr.split(':', 1)
+    proto, _, addr = conn_uri.partition(':')
+    # The port follows the last colon, so IPv6 addresses are kept whole
+    ip, sep, port = addr.rpartition(':')
+    if sep and ip:
         return 'p%s:%s:%s' % (proto, port, ip)
     return 'p%s:%s' % (proto, addr)
 
@@ -29,26 +33,39 @@ def _connection_to_manager_uri(conn_uri):
 # TODO(jlibosva): Get rid of this runtime configuration and raise a message to
 #                 set Manager outside of ovsdbapp.
 def enable_connection_uri(conn_uri, execute=None, **kwargs):
+    return enable_connection_uris([conn_uri], execute=execute, **kwargs)
+
+
+def enable_connection_uris(conn_uris, execute=None, **kwargs):
+    """Create a Manager for each connection URI with a single ovs-vsctl call
+
+    As all Managers are created in one OVSDB transaction, none of them are
+    created if any of them fails, e.g. because its target already exists.
+    """
     timeout = kwargs.pop('timeout', 5)
     # NOTE(ralonsoh): the command timeout , "timeout", is defined in seconds;
     # the probe timeout is defined in milliseconds. If "timeout" is used, must
     # be converted to ms.
     probe = (timeout * 1000 if kwargs.pop('set_timeout', None) else
              kwargs.pop('inactivity_probe', None))
-    man_uri = _connection_to_manager_uri(conn_uri)
-    cmd = ['ovs-vsctl', '--timeout=%d' % timeout, '--id=@manager',
-           '--', 'create', 'Manager', 'target="%s"' % man_uri,
-           '--', 'add', 'Open_vSwitch', '.', 'manager_options', '@manager']
-    if probe is not None:
-        cmd += ['--', 'set', 'Manager', man_uri, 'inactivity_probe=%s' % probe]
+    cmd = ['ovs-vsctl', '--timeout=%d' % timeout]
+    for i, conn_uri in enumerate(conn_uris):
+        man_uri = _connection_to_manager_uri(conn_uri)
+        man_id = '@manager%d' % i
+        cmd += ['--', '--id=%s' % man_id, 'create', 'Manager',
+                'target="%s"' % man_uri,
+                '--', 'add', 'Open_vSwitch', '.', 'manager_options', man_id]
+        if probe is not None:
+            cmd += ['--', 'set', 'Manager', man_uri,
+                    'inactivity_probe=%s' % probe]
     if execute:
         return execute(cmd, **kwargs).rstrip()
     else:
-        obj = subprocess.Popen(['sudo'] + cmd, shell=False,
-                               stdin=subprocess.PIPE,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-        out, err = obj.communicate()
-        if err:
-            LOG.debug(err)  # will fail if target already exists
-        return out.rstrip()
+        # There is no need to fork sudo as well when already running as root
+        if os.geteuid() != 0:
+            cmd = ['sudo'] + cmd
+        obj = subprocess.run(cmd, shell=False, stdin=subprocess.DEVNULL,
+                             capture_output=True)
+        if obj.stderr:
+            LOG.debug(obj.stderr)  # will fail if target already exists
+        return obj.stdout.rstrip()
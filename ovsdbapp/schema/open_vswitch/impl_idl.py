@@ -28,11 +28,39 @@ class VswitchdInterfaceAddException(exceptions.OvsdbAppException):
     message = "Failed to add interfaces: %(ifaces)s"
 
 
+def _read_only(commands):
+    return all(getattr(c, 'READ_ONLY', False) for c in commands)
+
+
 class OvsVsctlTransaction(transaction.Transaction):
+    # Whether the commands being committed are all read-only
+    read_only = False
+
+    def _do_commit(self):
+        self.read_only = _read_only(self.commands)
+        return super()._do_commit()
+
+    def _commit_combined(self, txns):
+        self.read_only = _read_only(c for t in txns for c in t.commands)
+        return super()._commit_combined(txns)
+
     def pre_commit(self, txn):
-        self.api._ovs.increment('next_cfg')
+        # Bumping next_cfg makes even a read-only transaction a write that
+        # has to wait for ovs-vswitchd to reconfigure in do_post_commit()
+        if not self.read_only:
+            self.api._ovs.increment('next_cfg')
         txn.expected_ifaces = set()
 
+    def _run_batched(self, txn):
+        # Interfaces are expected for each transaction of the batch, so that
+        # post_commit() only reports those added by its own commands
+        txn.expected_ifaces = self._expected_ifaces = set()
+        super()._run_batched(txn)
+
+    def _post_commit_results(self, txn):
+        txn.expected_ifaces = self._expected_ifaces
+        return super()._post_commit_results(txn)
+
     def post_commit(self, txn):
         super().post_commit(txn)
         # ovs-vsctl only logs these failures and does not return nonzero
@@ -62,13 +90,18 @@ class OvsVsctlTransaction(transaction.Transaction):
 
     def post_commit_failed_interfaces(self, txn):
         failed = []
+        if not txn.expected_ifaces:
+            return failed
+        ifaces = self.api.idl.tables['Interface'].rows
         for iface_uuid in txn.expected_ifaces:
             uuid = txn.get_insert_uuid(iface_uuid)
-            if uuid:
-                ifaces = self.api.idl.tables['Interface']
-                iface = ifaces.rows.get(uuid)
-                if iface and (not iface.ofport or iface.ofport == -1):
-                    failed.append(iface.name)
+            iface = ifaces.get(uuid) if uuid else None
+            if iface is None:
+                continue
+            # Reading a Row column converts its datum, only do it once
+            ofport = iface.ofport
+            if not ofport or ofport == -1:
+                failed.append(iface.name)
         return failed
 
     def vswitchd_has_completed(self, next_cfg):
@@ -85,7 +118,8 @@ class OvsdbIdl(ovs_idl.Backend, api.API):
 
     @property
     def _ovs(self):
-        return list(self._tables['Open_vSwitch'].rows.values())[0]
+        # Commands read this several times per run_idl(), don't copy the rows
+        return next(iter(self._tables['Open_vSwitch'].rows.values()))
 
     def create_transaction(self, check_error=False, log_errors=True, **kwargs):
         return OvsVsctlTransaction(self, self.ovsdb_connection,
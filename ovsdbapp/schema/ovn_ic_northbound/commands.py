@@ -60,7 +60,7 @@ class TsDelCommand(cmd.BaseCommand):
 class TsListCommand(cmd.ReadOnlyCommand):
     def run_idl(self, txn):
         table = self.api.tables['Transit_Switch']
-        self.result = [rowview.RowView(r) for r in table.rows.values()]
+        self.result = list(map(rowview.RowView, table.rows.values()))
 
 
 class TsGetCommand(cmd.BaseGetRowCommand):
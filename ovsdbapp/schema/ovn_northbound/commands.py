@@ -215,8 +215,8 @@ class _AclDelHelper(cmd.BaseCommand):
             msg = "%s %s does not exist" % (self.lookup_table, self.entity)
             raise RuntimeError(msg) from e
 
-        for acl in [a for a in entity.acls
-                    if idlutils.row_match(a, self.conditions)]:
+        match = idlutils.compile_conditions(self.conditions)
+        for acl in [a for a in entity.acls if match(a)]:
             entity.delvalue('acls', acl)
             acl.delete()
 
@@ -449,8 +449,9 @@ class QoSDelCommand(cmd.BaseCommand):
             msg = 'Logical Switch %s does not exist' % self.switch
             raise RuntimeError(msg) from e
 
+        match = idlutils.compile_conditions(self.conditions)
         for row in ls.qos_rules:
-            if idlutils.row_match(row, self.conditions):
+            if match(row):
                 ls.delvalue('qos_rules', row)
                 row.delete()
 
@@ -1455,8 +1456,8 @@ class LrNatDelCommand(cmd.BaseCommand):
     def run_idl(self, txn):
         lr = self.api.lookup('Logical_Router', self.router)
         found = False
-        for nat in [r for r in lr.nat
-                    if idlutils.row_match(r, self.conditions)]:
+        match = idlutils.compile_conditions(self.conditions)
+        for nat in [r for r in lr.nat if match(r)]:
             found = True
             lr.delvalue('nat', nat)
             nat.delete()
@@ -1544,8 +1545,9 @@ class LrPolicyDelCommand(cmd.BaseCommand):
     def run_idl(self, txn):
         lr = self.api.lookup('Logical_Router', self.router)
         found = False
+        match = idlutils.compile_conditions(self.conditions)
         for policy in lr.policies:
-            if idlutils.row_match(policy, self.conditions):
+            if match(policy):
                 found = True
                 lr.delvalue('policies', policy)
                 policy.delete()
@@ -12,12 +12,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import select
 from unittest import mock
 
 from ovs import poller
+import testtools
 
+from ovsdbapp.backend.ovs_idl import command
 from ovsdbapp.backend.ovs_idl import connection
 from ovsdbapp.backend.ovs_idl import idlutils
+from ovsdbapp.backend.ovs_idl.linux import connection_utils as linux_utils
+from ovsdbapp.backend.ovs_idl import transaction
+from ovsdbapp import exceptions
 from ovsdbapp.tests import base
 
 
@@ -57,3 +64,182 @@ class TestTransactionQueue(base.TestCase):
         # a test to cover py34 failure during initialization (LP Bug #1580270)
         # make sure no ValueError: can't have unbuffered text I/O is raised
         connection.TransactionQueue()
+
+    def test_put_get_nowait(self):
+        txns = connection.TransactionQueue(2)
+        txns.put('txn1')
+        txns.put('txn2')
+        self.assertEqual('txn1', txns.get_nowait())
+        self.assertEqual('txn2', txns.get_nowait())
+        self.assertIsNone(txns.get_nowait())
+
+
+@testtools.skipIf(os.name == 'nt', 'Linux wait queues only')
+class TestLinuxWaitQueue(base.TestCase):
+
+    def _test_notify_consume(self, wait_queue_cls):
+        wait_queue = wait_queue_cls(max_queue_size=2)
+
+        def readable():
+            return bool(select.select([wait_queue.alert_fileno], [], [], 0)[0])
+
+        self.assertFalse(readable())
+        wait_queue.alert_notify()
+        wait_queue.alert_notify()
+        wait_queue.alert_notification_consume()
+        self.assertTrue(readable())
+        wait_queue.alert_notification_consume()
+        self.assertFalse(readable())
+
+    def test_pipe_wait_queue(self):
+        self._test_notify_consume(linux_utils.PipeWaitQueue)
+
+    @testtools.skipUnless(hasattr(os, 'eventfd'), 'os.eventfd not available')
+    def test_eventfd_wait_queue(self):
+        self._test_notify_consume(linux_utils.EventfdWaitQueue)
+
+
+class TestOVSNativeConnectionBatch(base.TestCase):
+
+    @mock.patch.object(connection, 'TransactionQueue')
+    def setUp(self, mock_trans_queue):
+        super(TestOVSNativeConnectionBatch, self).setUp()
+        self.conn = connection.Connection(mock.Mock(), timeout=1, batch=True)
+        mock_trans_queue.assert_called_once_with(
+            connection.Connection.BATCH_SIZE)
+
+    def _txn(self, api):
+        txn = transaction.Transaction(api, self.conn)
+        txn.results = mock.Mock()
+        return txn
+
+    def test_commit_batch(self):
+        api1, api2 = mock.Mock(), mock.Mock()
+        txn1, txn2, txn3 = self._txn(api1), self._txn(api1), self._txn(api2)
+        self.conn.txns.get_nowait.side_effect = [txn2, txn3, None]
+        with mock.patch.object(transaction.Transaction, 'do_commit_batched',
+                               return_value=['r1', 'r2']) as batched, \
+                mock.patch.object(transaction.Transaction, 'do_commit',
+                                  return_value='r3') as do_commit:
+            self.conn._commit_batch(txn1)
+        batched.assert_called_once_with([txn2])
+        do_commit.assert_called_once_with()
+        txn1.results.put.assert_called_once_with('r1')
+        txn2.results.put.assert_called_once_with('r2')
+        txn3.results.put.assert_called_once_with('r3')
+        self.assertEqual(3, self.conn.txns.task_done.call_count)
+
+    def test_commit_batch_keeps_queue_order(self):
+        api1, api2 = mock.Mock(), mock.Mock()
+        txns = [self._txn(api1), self._txn(api2), self._txn(api1)]
+        self.conn.txns.get_nowait.side_effect = txns[1:] + [None]
+        committed = []
+
+        def do_commit(txn):
+            committed.append(txn)
+            return 'r'
+
+        with mock.patch.object(transaction.Transaction, 'do_commit_batched',
+                               autospec=True) as batched, \
+                mock.patch.object(transaction.Transaction, 'do_commit',
+                                  autospec=True, side_effect=do_commit):
+            self.conn._commit_batch(txns[0])
+        # txns[2] shares its API with txns[0] but was queued after txns[1]
+        batched.assert_not_called()
+        self.assertEqual(txns, committed)
+
+    def test_commit_batch_exception(self):
+        txn1, txn2 = self._txn(mock.Mock()), self._txn(mock.Mock())
+        self.conn.txns.get_nowait.side_effect = [txn2, None]
+        with mock.patch.object(transaction.Transaction, 'do_commit',
+                               side_effect=[RuntimeError, 'r2']):
+            self.conn._commit_batch(txn1)
+        result = txn1.results.put.call_args[0][0]
+        self.assertIsInstance(result, idlutils.ExceptionResult)
+        self.assertIsInstance(result.ex, RuntimeError)
+        txn2.results.put.assert_called_once_with('r2')
+
+
+class TestTransactionBatched(base.TestCase):
+
+    def setUp(self):
+        super(TestTransactionBatched, self).setUp()
+        self.api = mock.Mock()
+        conn = mock.Mock(timeout=1)
+        self.txn1 = transaction.Transaction(self.api, conn)
+        self.txn2 = transaction.Transaction(self.api, conn)
+        self.cmd1 = self.txn1.add(mock.Mock(result='r1'))
+        self.cmd2 = self.txn2.add(mock.Mock(result='r2'))
+
+    @mock.patch.object(transaction.idl, 'Transaction')
+    def test_do_commit_batched(self, mock_txn):
+        idl_txn = mock_txn.return_value
+        idl_txn.commit_block.return_value = idl_txn.SUCCESS
+        result = self.txn1.do_commit_batched([self.txn2])
+        self.assertEqual([['r1'], ['r2']], result)
+        mock_txn.assert_called_once_with(self.api.idl)
+        self.cmd1.run_idl.assert_called_once_with(idl_txn)
+        self.cmd2.run_idl.assert_called_once_with(idl_txn)
+        self.cmd1.post_commit.assert_called_once_with(idl_txn)
+        self.cmd2.post_commit.assert_called_once_with(idl_txn)
+
+    @mock.patch.object(transaction.idl, 'Transaction')
+    def test_do_commit_batched_post_commit_error(self, mock_txn):
+        idl_txn = mock_txn.return_value
+        idl_txn.commit_block.return_value = idl_txn.SUCCESS
+        error = RuntimeError()
+        self.cmd1.post_commit.side_effect = error
+        result = self.txn1.do_commit_batched([self.txn2])
+        self.assertIsInstance(result[0], idlutils.ExceptionResult)
+        self.assertIs(error, result[0].ex)
+        self.assertEqual(['r2'], result[1])
+        # The transactions are not committed again one by one
+        mock_txn.assert_called_once_with(self.api.idl)
+        self.cmd2.post_commit.assert_called_once_with(idl_txn)
+
+    @mock.patch.object(transaction.idl, 'Transaction')
+    def test_do_commit_batched_fallback(self, mock_txn):
+        self.cmd2.run_idl.side_effect = [RuntimeError, None]
+        idl_txn = mock_txn.return_value
+        idl_txn.commit_block.return_value = idl_txn.SUCCESS
+        result = self.txn1.do_commit_batched([self.txn2])
+        self.assertEqual([['r1'], ['r2']], result)
+        idl_txn.abort.assert_called_once_with()
+        self.assertEqual(3, mock_txn.call_count)
+        self.assertEqual(2, self.cmd1.run_idl.call_count)
+        self.assertEqual(2, self.cmd2.run_idl.call_count)
+
+    @mock.patch.object(transaction.idl, 'Transaction')
+    def test_do_commit_batched_fallback_timeout(self, mock_txn):
+        self.cmd1.run_idl.side_effect = RuntimeError
+        # The time spent on the combined transaction counts for the fallback
+        with mock.patch.object(transaction.time, 'time',
+                               side_effect=[0, 2, 2]):
+            result = self.txn1.do_commit_batched([self.txn2])
+        self.assertEqual(1, mock_txn.call_count)
+        self.assertEqual(0, self.txn2.start_time)
+        for res in result:
+            self.assertIsInstance(res, idlutils.ExceptionResult)
+            self.assertIsInstance(res.ex, exceptions.TimeoutException)
+        self.cmd2.run_idl.assert_not_called()
+
+    def test_post_commit_skips_noop(self):
+        class NoPostCommit(command.BaseCommand):
+            def run_idl(self, txn):
+                pass
+
+        class PostCommit(NoPostCommit):
+            post_commit = mock.Mock()
+
+        no_post_cmd = self.txn1.add(NoPostCommit(self.api))
+        post_cmd = self.txn1.add(PostCommit(self.api))
+        self.txn1.post_commit(mock.sentinel.txn)
+        self.cmd1.post_commit.assert_called_once_with(mock.sentinel.txn)
+        post_cmd.post_commit.assert_called_once_with(mock.sentinel.txn)
+        # post_commit() patched after the command class was created
+        with mock.patch.object(NoPostCommit, 'post_commit') as post_commit:
+            self.txn1.post_commit(mock.sentinel.txn)
+        post_commit.assert_called_once_with(mock.sentinel.txn)
+        with mock.patch.object(no_post_cmd, 'post_commit') as post_commit:
+            self.txn1.post_commit(mock.sentinel.txn)
+        post_commit.assert_called_once_with(mock.sentinel.txn)
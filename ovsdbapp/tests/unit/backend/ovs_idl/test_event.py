@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from ovsdbapp.backend.ovs_idl import event
+from ovsdbapp.tests import base
+
+
+class FakeEvent(event.RowEvent):
+    def run(self, event, row, old):
+        pass
+
+
+class CustomMatchEvent(FakeEvent):
+    def matches(self, event, row, old=None):
+        return True
+
+
+class TestRowEvent(base.TestCase):
+    def test_index_keys(self):
+        ev = FakeEvent((FakeEvent.ROW_CREATE, FakeEvent.ROW_UPDATE),
+                       'FakeTable', None)
+        self.assertEqual(frozenset({('FakeTable', FakeEvent.ROW_CREATE),
+                                    ('FakeTable', FakeEvent.ROW_UPDATE)}),
+                         ev._index_keys())
+
+    def test_index_keys_single_event_string(self):
+        ev = FakeEvent(FakeEvent.ROW_UPDATE, 'FakeTable', None)
+        self.assertEqual(frozenset({('FakeTable', FakeEvent.ROW_UPDATE)}),
+                         ev._index_keys())
+
+    def test_index_keys_custom_matches(self):
+        ev = CustomMatchEvent((FakeEvent.ROW_CREATE,), 'FakeTable', None)
+        self.assertIsNone(ev._index_keys())
+
+    def test_index_keys_wait_event(self):
+        class FakeWaitEvent(event.WaitEvent):
+            pass
+
+        ev = FakeWaitEvent((FakeEvent.ROW_DELETE,), 'FakeTable', None)
+        self.assertEqual(frozenset({('FakeTable', FakeEvent.ROW_DELETE)}),
+                         ev._index_keys())
+
+    def test_base_match_conditions_changed(self):
+        row = mock.Mock(name='row')
+        row.name = 'foo'
+        conditions = [('name', '=', 'bar')]
+        ev = FakeEvent((FakeEvent.ROW_CREATE,), 'FakeTable', conditions)
+        self.assertFalse(ev.base_match(FakeEvent.ROW_CREATE, row, None))
+        # Changed in place
+        conditions[0] = ('name', '=', 'foo')
+        self.assertTrue(ev.base_match(FakeEvent.ROW_CREATE, row, None))
+        # Reassigned
+        ev.conditions = (('name', '!=', 'foo'),)
+        self.assertFalse(ev.base_match(FakeEvent.ROW_CREATE, row, None))
+        # Only the latest matcher is kept
+        self.assertIs(ev.conditions, ev._compiled_conditions[0])
+
+    @mock.patch.object(event.idlutils, 'row2str')
+    def test_matches_no_debug_formatting(self, mock_row2str):
+        ev = FakeEvent((FakeEvent.ROW_CREATE,), 'FakeTable', None)
+        row = mock.Mock()
+        row._table.name = 'FakeTable'
+        with mock.patch.object(event.LOG, 'isEnabledFor', return_value=False):
+            self.assertTrue(ev.matches(FakeEvent.ROW_CREATE, row))
+        mock_row2str.assert_not_called()
+        with mock.patch.object(event.LOG, 'isEnabledFor', return_value=True):
+            self.assertTrue(ev.matches(FakeEvent.ROW_CREATE, row))
+        mock_row2str.assert_called_once_with(row)
+
+
+class TestRowEventHandler(base.TestCase):
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_matches_only_called_for_candidates(self, mock_start):
+        handler = event.RowEventHandler()
+        ev = FakeEvent((FakeEvent.ROW_CREATE,), 'FakeTable', None)
+        handler.watch_event(ev)
+        row = mock.Mock()
+        with mock.patch.object(ev, 'matches',
+                               return_value=True) as matches:
+            row._table.name = 'OtherTable'
+            self.assertEqual(
+                (), handler.matching_events(FakeEvent.ROW_CREATE, row, None))
+            row._table.name = 'FakeTable'
+            self.assertEqual(
+                (), handler.matching_events(FakeEvent.ROW_DELETE, row, None))
+            matches.assert_not_called()
+            self.assertEqual(
+                (ev,),
+                handler.matching_events(FakeEvent.ROW_CREATE, row, None))
+            matches.assert_called_once_with(FakeEvent.ROW_CREATE, row, None)
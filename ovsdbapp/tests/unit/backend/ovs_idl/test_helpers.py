@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from unittest import mock
+
 from ovsdbapp.schema.open_vswitch import helpers
 from ovsdbapp.tests import base
 
@@ -19,7 +21,8 @@ from ovsdbapp.tests import base
 CONNECTION_TO_MANAGER_URI_MAP = (
     ('unix:/path/to/file', 'punix:/path/to/file'),
     ('tcp:127.0.0.1:6640', 'ptcp:6640:127.0.0.1'),
-    ('ssl:192.168.1.1:8080', 'pssl:8080:192.168.1.1'))
+    ('ssl:192.168.1.1:8080', 'pssl:8080:192.168.1.1'),
+    ('tcp:[::1]:6640', 'ptcp:6640:[::1]'))
 
 
 class TestOVSNativeHelpers(base.TestCase):
@@ -28,3 +31,45 @@ class TestOVSNativeHelpers(base.TestCase):
         for conn_uri, expected in CONNECTION_TO_MANAGER_URI_MAP:
             self.assertEqual(expected,
                              helpers._connection_to_manager_uri(conn_uri))
+
+    @mock.patch.object(helpers.os, 'geteuid', return_value=1000)
+    @mock.patch.object(helpers.subprocess, 'run')
+    def test_enable_connection_uri(self, mock_run, mock_geteuid):
+        mock_run.return_value = mock.Mock(stdout=b'uuid\n', stderr=b'')
+        self.assertEqual(
+            b'uuid', helpers.enable_connection_uri('tcp:127.0.0.1:6640'))
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(['sudo', 'ovs-vsctl', '--timeout=5'], cmd[:3])
+        self.assertIn('target="ptcp:6640:127.0.0.1"', cmd)
+
+    @mock.patch.object(helpers.os, 'geteuid', return_value=0)
+    @mock.patch.object(helpers.subprocess, 'run')
+    def test_enable_connection_uri_as_root(self, mock_run, mock_geteuid):
+        mock_run.return_value = mock.Mock(stdout=b'uuid\n', stderr=b'')
+        helpers.enable_connection_uri('tcp:127.0.0.1:6640')
+        self.assertEqual('ovs-vsctl', mock_run.call_args[0][0][0])
+
+    def test_enable_connection_uri_execute(self):
+        execute = mock.Mock(return_value='uuid\n')
+        self.assertEqual('uuid', helpers.enable_connection_uri(
+            'tcp:127.0.0.1:6640', execute=execute, run_as_root=True))
+        execute.assert_called_once_with(mock.ANY, run_as_root=True)
+
+    def test_enable_connection_uris(self):
+        execute = mock.Mock(return_value='')
+        helpers.enable_connection_uris(
+            ['tcp:127.0.0.1:6640', 'unix:/path/to/file'], execute=execute,
+            inactivity_probe=1000)
+        expected = [
+            'ovs-vsctl', '--timeout=5',
+            '--', '--id=@manager0', 'create', 'Manager',
+            'target="ptcp:6640:127.0.0.1"',
+            '--', 'add', 'Open_vSwitch', '.', 'manager_options', '@manager0',
+            '--', 'set', 'Manager', 'ptcp:6640:127.0.0.1',
+            'inactivity_probe=1000',
+            '--', '--id=@manager1', 'create', 'Manager',
+            'target="punix:/path/to/file"',
+            '--', 'add', 'Open_vSwitch', '.', 'manager_options', '@manager1',
+            '--', 'set', 'Manager', 'punix:/path/to/file',
+            'inactivity_probe=1000']
+        execute.assert_called_once_with(expected)
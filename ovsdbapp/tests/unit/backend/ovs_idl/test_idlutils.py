@@ -14,6 +14,7 @@
 
 import unittest
 from unittest import mock
+import uuid
 
 import testscenarios
 
@@ -124,6 +125,74 @@ class TestIdlUtils(base.TestCase):
         self.assertTrue(idlutils.condition_match(
             row, ("comments", "!=", ["d"])))
 
+    def test_compile_condition(self):
+        table = MockTable("SomeTable",
+                          MockColumn("tag", "integer", is_optional=True,
+                                     test_value=[42]),
+                          MockColumn("num", "integer", is_optional=True,
+                                     test_value=[]),
+                          MockColumn("ids", "integer", is_optional=False,
+                                     test_value=42),
+                          MockColumn("comments", "string",
+                                     test_value=["a", "b", "c"]),
+                          MockColumn("ext", "string",
+                                     test_value={"a": "1", "b": "2"}))
+        row = MockRow(table=table)
+        conditions = [("tag", "=", 42), ("tag", "!=", []), ("num", "=", []),
+                      ("num", "!=", 42), ("ids", "=", 42), ("ids", "=", 43),
+                      ("comments", "=", ["c", "b", "c"]),
+                      ("comments", "=", ["d"]), ("comments", "!=", ["d"]),
+                      ("comments", "!=", ["a", "d"]),
+                      ("comments", "=", []), ("comments", "!=", []),
+                      ("num", "=", []), ("num", "!=", []),
+                      ("ext", "=", {"a": "1"}), ("ext", "=", {"c": "1"}),
+                      ("ext", "!=", {"a": "2"}), ("ext", "!=", {"a": "1"})]
+        for cond in conditions:
+            self.assertEqual(idlutils.condition_match(row, cond),
+                             idlutils.compile_condition(cond)(row), cond)
+        self.assertRaises(ValueError,
+                          idlutils.compile_condition(("ids", "=", "42")), row)
+        self.assertRaises(NotImplementedError,
+                          idlutils.compile_condition(("ids", "<", 42)), row)
+
+    def test_compile_conditions(self):
+        table = MockTable("SomeTable",
+                          MockColumn("ids", "integer", test_value=42),
+                          MockColumn("status", "string", test_value="up"))
+        row = MockRow(table=table)
+        match = idlutils.compile_conditions([("ids", "=", 42),
+                                             ("status", "=", "up")])
+        self.assertTrue(match(row))
+        match = idlutils.compile_conditions([("ids", "=", 42),
+                                             ("status", "!=", "up")])
+        self.assertFalse(match(row))
+        self.assertTrue(idlutils.compile_conditions([])(row))
+
+    def test_parse_connection(self):
+        conn = "tcp:127.0.0.1:6640, ssl:10.0.0.1:6641"
+        expected = ["tcp:127.0.0.1:6640", "ssl:10.0.0.1:6641"]
+        parsed = idlutils.parse_connection(conn)
+        self.assertEqual(expected, parsed)
+        # The cached result must not be affected by changes to a previous one
+        parsed.append("unix:/run/db.sock")
+        self.assertEqual(expected, idlutils.parse_connection(conn))
+
+    def test_parse_uuid(self):
+        uuid_ = uuid.uuid4()
+        self.assertEqual(uuid_, idlutils._parse_uuid(str(uuid_)))
+        self.assertEqual(uuid_, idlutils._parse_uuid(uuid_.hex))
+        self.assertEqual(uuid_, idlutils._parse_uuid(str(uuid_)))
+        for record in ("br-int", "x" * 36):
+            self.assertRaises(ValueError, idlutils._parse_uuid, record)
+
+    def test_get_column_value_optional_cached(self):
+        column = MockColumn("tag", "integer", is_optional=True,
+                            test_value=[42])
+        row = MockRow(table=MockTable("SomeTable", column))
+        self.assertEqual(42, idlutils.get_column_value(row, "tag"))
+        self.assertEqual(42, idlutils.get_column_value(row, "tag"))
+        column.type.is_optional.assert_called_once_with()
+
     def test_db_replace_record_dict(self):
         obj = {'a': 1, 'b': 2}
         self.assertIs(obj, idlutils.db_replace_record(obj))
@@ -185,6 +254,23 @@ class TestIdlUtils(base.TestCase):
                                      FAKE_RECORD_GUID)
         self.assertEqual(mock.sentinel.row_value, res)
 
+    @mock.patch('sys.platform', 'linux2')
+    def test_row_by_record_table_added(self):
+        mock_idl_ = mock.MagicMock()
+        mock_idl_.tables = {}
+        self.assertEqual({}, idlutils._prepare_lookup(mock_idl_))
+        idlutils._PREPARED_LOOKUPS[mock_idl_] = {}
+        mock_table = mock.MagicMock(
+            rows={mock.sentinel.row: mock.sentinel.row_value})
+        mock_idl_.tables[mock.sentinel.table_name] = mock_table
+
+        res = idlutils.row_by_record(mock_idl_,
+                                     mock.sentinel.table_name,
+                                     'fake_record')
+        self.assertEqual(mock.sentinel.row_value, res)
+        self.assertIn(mock.sentinel.table_name,
+                      idlutils._PREPARED_LOOKUPS[mock_idl_])
+
     def test_index_name(self):
         expected = {
             ('one',): 'one',
@@ -198,6 +284,125 @@ class TestIdlUtils(base.TestCase):
         self.assertRaises(AssertionError, idlutils.index_name)
 
 
+class PartialRow(object):
+    """A row only holding some of its table's columns, like an old row"""
+
+    def __init__(self, table, **values):
+        self._table = table
+        self.uuid = 'fake-uuid'
+        self.values = values
+        self.fetched = []
+
+    def __getattr__(self, attr):
+        if attr in self._table.columns:
+            self.fetched.append(attr)
+            try:
+                return self.values[attr]
+            except KeyError:
+                raise AttributeError(attr)
+        raise AttributeError(attr)
+
+
+class TestRowValues(base.TestCase):
+    def setUp(self):
+        super(TestRowValues, self).setUp()
+        self.table = MockTable("SomeTable",
+                               MockColumn("name", "string"),
+                               MockColumn("tag", "integer"))
+        self.table.rows = mock.Mock()
+
+    def test_row2str_partial_row(self):
+        row = PartialRow(self.table, name="foo")
+        self.assertEqual("SomeTable(name=foo)", idlutils.row2str(row))
+        self.assertEqual(["name", "tag"], row.fetched)
+
+    def test_frozen_row_partial_row(self):
+        row = PartialRow(self.table, tag=42)
+        idlutils.frozen_row(row)
+        self.table.rows.IndexEntry.assert_called_once_with(uuid='fake-uuid',
+                                                           tag=42)
+        self.assertEqual(["name", "tag"], row.fetched)
+
+
+class TestRowsByValue(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = [self._make_row(i) for i in range(3)]
+        self.table = mock.Mock(rows=mock.MagicMock(indexes={}))
+        self.table.rows.values.side_effect = lambda: iter(self.rows)
+        self.idl = mock.Mock(tables={'Table': self.table}, change_seqno=1,
+                             txn=None)
+
+    @staticmethod
+    def _make_row(uuid):
+        row = mock.Mock(uuid=uuid)
+        row.name = 'row%d' % uuid
+        return row
+
+    def test_rows_by_value(self):
+        self.assertEqual(
+            [self.rows[1]],
+            list(idlutils.rows_by_value(self.idl, 'Table', 'name', 'row1')))
+        self.assertEqual(
+            [], list(idlutils.rows_by_value(self.idl, 'Table', 'name', 'x')))
+        # The table has only been walked once
+        self.table.rows.values.assert_called_once_with()
+
+    def test_rows_by_value_seqno_changed(self):
+        idlutils.row_by_value(self.idl, 'Table', 'name', 'row1')
+        new_row = self._make_row(3)
+        self.rows.append(new_row)
+        self.assertIsNone(
+            idlutils.row_by_value(self.idl, 'Table', 'name', 'row3', None))
+        self.idl.change_seqno += 1
+        self.assertEqual(
+            new_row, idlutils.row_by_value(self.idl, 'Table', 'name', 'row3'))
+
+    def test_rows_by_value_txn_touched_table(self):
+        idlutils.row_by_value(self.idl, 'Table', 'name', 'row1')
+        self.rows[2].name = 'renamed'
+        self.rows[2]._table = self.table
+        self.idl.txn = mock.Mock(_txn_rows={2: self.rows[2]})
+        self.assertEqual(
+            self.rows[2],
+            idlutils.row_by_value(self.idl, 'Table', 'name', 'renamed'))
+
+    def test_rows_by_value_unhashable(self):
+        for row in self.rows:
+            row.ports = [row.uuid]
+        self.assertEqual(
+            [self.rows[1]],
+            list(idlutils.rows_by_value(self.idl, 'Table', 'ports', [1])))
+
+
+class TestRowByReference(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.refs = [mock.Mock(uuid=i) for i in range(4)]
+        self.rows = [mock.Mock(ports=self.refs[:2]),
+                     mock.Mock(ports=self.refs[2:3])]
+        self.table = mock.Mock()
+        self.table.rows.values.side_effect = lambda: iter(self.rows)
+        self.idl = mock.Mock(tables={'Bridge': self.table}, change_seqno=1,
+                             txn=None)
+
+    def test_row_by_reference(self):
+        for ref, row in ((0, 0), (1, 0), (2, 1)):
+            self.assertIs(self.rows[row], idlutils.row_by_reference(
+                self.idl, 'Bridge', 'ports', self.refs[ref]))
+        self.assertRaises(idlutils.RowNotFound, idlutils.row_by_reference,
+                          self.idl, 'Bridge', 'ports', self.refs[3])
+        # The table has only been walked once
+        self.table.rows.values.assert_called_once_with()
+
+    def test_row_by_reference_no_seqno(self):
+        del self.idl.change_seqno
+        self.assertIs(self.rows[1], idlutils.row_by_reference(
+            self.idl, 'Bridge', 'ports', self.refs[2]))
+        self.assertRaises(idlutils.RowNotFound, idlutils.row_by_reference,
+                          self.idl, 'Bridge', 'ports', self.refs[3])
+
+
 class TestWaitForChange(base.TestCase):
     assertRaises = unittest.TestCase.assertRaises  # context manager support
     scenarios = testscenarios.multiply_scenarios([
@@ -246,7 +451,8 @@ class TestWaitForChange(base.TestCase):
         poller_inst = mock.MagicMock()
         seqno = Idl.change_seqno if self.seqno_eq else Idl.change_seqno - 1
 
-        @mock.patch.object(idlutils.time, 'time', side_effect=[now, end_time])
+        @mock.patch.object(idlutils.time, 'monotonic',
+                           side_effect=[now, end_time])
         @mock.patch.object(idlutils.poller, 'Poller', return_value=poller_inst)
         def do_test(_poll_mock, _time_mock):
             if expected['exc_raised']:
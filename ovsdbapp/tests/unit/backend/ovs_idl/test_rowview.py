@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from ovsdbapp.backend.ovs_idl import rowview
+from ovsdbapp.tests import base
+
+
+class FakeTable(object):
+    def __init__(self, *columns):
+        self.columns = {c: mock.sentinel.column for c in columns}
+
+
+class FakeRow(object):
+    def __init__(self, table, **values):
+        self._table = table
+        self.uuid = mock.sentinel.uuid
+        for column, value in values.items():
+            setattr(self, column, value)
+
+
+class TestRowView(base.TestCase):
+    def setUp(self):
+        super(TestRowView, self).setUp()
+        self.table = FakeTable('name', 'external_ids')
+        self.row = FakeRow(self.table, name='foo', external_ids={'a': 'b'})
+
+    def test_columns(self):
+        view = rowview.RowView(self.row)
+        self.assertIsInstance(view, rowview.RowView)
+        self.assertEqual('foo', view.name)
+        self.assertEqual({'a': 'b'}, view.external_ids)
+        # Non-column attributes still go through __getattr__
+        self.assertEqual(mock.sentinel.uuid, view.uuid)
+        self.row.name = 'bar'
+        self.assertEqual('bar', view.name)
+
+    def test_view_class_per_table(self):
+        view = rowview.RowView(self.row)
+        other = rowview.RowView(FakeRow(self.table, name='bar'))
+        self.assertIs(type(view), type(other))
+        self.assertIsNot(rowview.RowView, type(view))
+        other_table = FakeRow(FakeTable('name'), name='baz')
+        self.assertIsNot(type(view), type(rowview.RowView(other_table)))
+
+    def test_view_class_name(self):
+        self.table.name = 'Bridge'
+        view = rowview.RowView(self.row)
+        self.assertEqual('RowView_Bridge', type(view).__name__)
+
+    def test_set_attribute_on_view(self):
+        view = rowview.RowView(self.row)
+        view.name = 'bar'
+        self.assertEqual('bar', view.name)
+        self.assertEqual('foo', self.row.name)
+
+    def test_mock_row(self):
+        row = mock.Mock()
+        view = rowview.RowView(row)
+        self.assertIs(rowview.RowView, type(view))
+        self.assertEqual(row.name, view.name)
+
+    def test_eq_hash(self):
+        view = rowview.RowView(self.row)
+        self.assertEqual(view, rowview.RowView(self.row))
+        self.assertEqual(hash(self.row), hash(view))
@@ -58,3 +58,27 @@ class TestBackendOvsIdl(base.TestCase):
     def test_lookup_not_found_default(self):
         row = self.backend.lookup('Faketable', 'notthere', "NOT_FOUND")
         self.assertEqual(row, "NOT_FOUND")
+
+    @mock.patch.object(idlutils, 'get_index_column', return_value='name')
+    def test_lookup_row_lookup_cached(self, mock_get_index_column):
+        self.backend.lookup('Faketable', 'Fake1')
+        self.backend.lookup('Faketable', 'Fake1')
+        mock_get_index_column.assert_called_once_with(
+            self.backend.tables['Faketable'])
+
+    def test_lookup_uuid_only_table(self):
+        self.backend.lookup_table = {
+            'Faketable': idlutils.RowLookup(None, None, None)}
+        self.assertRaises(idlutils.RowNotFound, self.backend.lookup,
+                          'Faketable', 'Fake1')
+
+    def test_lookup_single_row_table(self):
+        self.backend.lookup_table = {
+            'Faketable': idlutils.RowLookup('Faketable', None, None)}
+        table = self.backend.tables['Faketable']
+        with mock.patch.object(table, 'max_rows', 1, create=True):
+            self.assertEqual('Fake1',
+                             self.backend.lookup('Faketable', 'x').name)
+        with mock.patch.object(table, 'max_rows', None, create=True):
+            self.assertRaises(idlutils.RowNotFound, self.backend.lookup,
+                              'Faketable', 'x')
@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from ovsdbapp.schema.hardware_vtep import commands
+from ovsdbapp.tests import base
+
+
+class TestGetPort(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.api = mock.Mock(tables={'Physical_Port': mock.Mock()})
+        self.port1 = mock.Mock()
+        self.port1.name = 'port1'
+        self.other_port1 = mock.Mock()
+        self.other_port1.name = 'port1'
+        self.pswitch = mock.Mock(ports=[self.port1])
+
+    @mock.patch.object(commands.idlutils, 'index_lookup_all')
+    def test_get_port_index(self, mock_lookup):
+        mock_lookup.return_value = iter([self.other_port1, self.port1])
+        self.assertIs(self.port1,
+                      commands._get_port(self.api, self.pswitch, 'port1'))
+        mock_lookup.assert_called_once_with(
+            self.api.tables['Physical_Port'], name='port1')
+
+    @mock.patch.object(commands.idlutils, 'index_lookup_all')
+    def test_get_port_not_indexed(self, mock_lookup):
+        # e.g. a port inserted by the current transaction
+        mock_lookup.return_value = iter([])
+        self.assertIs(self.port1,
+                      commands._get_port(self.api, self.pswitch, 'port1'))
+        self.assertIsNone(
+            commands._get_port(self.api, self.pswitch, 'port2'))
+
+    @mock.patch.object(commands.idlutils, 'index_lookup_all',
+                       side_effect=KeyError)
+    def test_get_port_no_index(self, mock_lookup):
+        self.assertIs(self.port1,
+                      commands._get_port(self.api, self.pswitch, 'port1'))
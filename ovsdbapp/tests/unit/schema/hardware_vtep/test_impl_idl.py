@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from ovsdbapp.backend import ovs_idl
+from ovsdbapp.schema.hardware_vtep import impl_idl
+from ovsdbapp.tests import base
+
+
+@mock.patch.object(ovs_idl.Backend, 'autocreate_indices')
+class TestHwVtepApiIdlImpl(base.TestCase):
+    def setUp(self):
+        super().setUp()
+        conn = mock.Mock()
+        conn.idl.tables = {'Ucast_Macs_Local': mock.Mock(),
+                           'Mcast_Macs_Remote': mock.Mock(),
+                           'Logical_Switch': mock.Mock()}
+        self.api = impl_idl.HwVtepApiIdlImpl(conn, start=False,
+                                             auto_index=False)
+
+    def test_autocreate_indices(self, mock_autocreate):
+        with mock.patch.object(self.api, 'create_index') as create_index:
+            self.api.autocreate_indices()
+        mock_autocreate.assert_called_once_with()
+        # The MAC tables missing from the schema are skipped
+        self.assertEqual(
+            [mock.call('Ucast_Macs_Local', 'logical_switch'),
+             mock.call('Mcast_Macs_Remote', 'logical_switch')],
+            create_index.call_args_list)
+
+    def test_autocreate_indices_already_exists(self, mock_autocreate):
+        with mock.patch.object(self.api, 'create_index',
+                               side_effect=ValueError) as create_index:
+            self.api.autocreate_indices()
+        self.assertEqual(2, create_index.call_count)
@@ -16,6 +16,7 @@ from unittest import mock
 
 import testtools
 
+from ovsdbapp.backend.ovs_idl import command
 from ovsdbapp import exceptions
 from ovsdbapp.schema.open_vswitch import impl_idl
 from ovsdbapp.tests import base
@@ -35,6 +36,83 @@ class TransactionTestCase(base.TestCase):
                                                        mock.Mock(), 0)
             transaction.post_commit(mock.Mock())
 
+    def test_post_commit_failed_interfaces(self):
+        api = mock.Mock()
+        ifaces = {'uuid%d' % i: mock.Mock(ofport=ofport)
+                  for i, ofport in enumerate(([1], [], -1))}
+        for uuid, iface in ifaces.items():
+            iface.name = 'iface-%s' % uuid
+        api.idl.tables = {'Interface': mock.Mock(rows=ifaces)}
+        transaction = impl_idl.OvsVsctlTransaction(api, mock.Mock(), 1)
+        txn = mock.Mock()
+        txn.expected_ifaces = {'tmp0', 'tmp1', 'tmp2', 'tmp3'}
+        txn.get_insert_uuid.side_effect = lambda u: {
+            'tmp0': 'uuid0', 'tmp1': 'uuid1', 'tmp2': 'uuid2'}.get(u)
+        self.assertEqual(
+            ['iface-uuid1', 'iface-uuid2'],
+            sorted(transaction.post_commit_failed_interfaces(txn)))
+
+    def test_post_commit_failed_interfaces_none_expected(self):
+        api = mock.Mock()
+        transaction = impl_idl.OvsVsctlTransaction(api, mock.Mock(), 1)
+        txn = mock.Mock(expected_ifaces=set())
+        self.assertEqual([], transaction.post_commit_failed_interfaces(txn))
+        txn.get_insert_uuid.assert_not_called()
+
+    def _test_pre_commit(self, commands, read_only):
+        api = mock.Mock()
+        transaction = impl_idl.OvsVsctlTransaction(api, mock.Mock(), 1)
+        transaction.commands = commands
+        with mock.patch.object(impl_idl.transaction.Transaction,
+                               '_do_commit'):
+            transaction.do_commit()
+        txn = mock.Mock()
+        transaction.pre_commit(txn)
+        self.assertEqual(read_only, transaction.read_only)
+        self.assertEqual(set(), txn.expected_ifaces)
+        if read_only:
+            api._ovs.increment.assert_not_called()
+        else:
+            api._ovs.increment.assert_called_once_with('next_cfg')
+
+    def test_pre_commit_read_only(self):
+        self._test_pre_commit([command.ReadOnlyCommand(mock.sentinel)] * 2,
+                              read_only=True)
+
+    def test_pre_commit_read_write(self):
+        self._test_pre_commit([command.ReadOnlyCommand(mock.sentinel),
+                               command.BaseCommand(mock.sentinel)],
+                              read_only=False)
+
+    def test_commit_combined_not_read_only(self):
+        transaction = impl_idl.OvsVsctlTransaction(mock.Mock(), mock.Mock(),
+                                                   1)
+        transaction.commands = [command.ReadOnlyCommand(mock.sentinel)]
+        other = impl_idl.OvsVsctlTransaction(mock.Mock(), mock.Mock(), 1)
+        other.commands = [command.BaseCommand(mock.sentinel)]
+        with mock.patch.object(impl_idl.transaction.Transaction,
+                               '_commit_combined'):
+            transaction._commit_combined([transaction, other])
+        self.assertFalse(transaction.read_only)
+
+    @mock.patch.object(impl_idl.transaction.idl, 'Transaction')
+    def test_commit_combined_expected_ifaces(self, mock_txn):
+        idl_txn = mock_txn.return_value
+        idl_txn.commit_block.return_value = idl_txn.SUCCESS
+        api = mock.Mock()
+        txns = [impl_idl.OvsVsctlTransaction(api, mock.Mock(), 1)
+                for _ in range(2)]
+        for i, txn in enumerate(txns):
+            txn.add(mock.Mock(result=None)).run_idl.side_effect = (
+                lambda t, i=i: t.expected_ifaces.add('iface%d' % i))
+        expected_ifaces = []
+        with mock.patch.object(
+                impl_idl.OvsVsctlTransaction, 'do_post_commit',
+                side_effect=lambda t: expected_ifaces.append(
+                    set(t.expected_ifaces))):
+            txns[0].do_commit_batched(txns[1:])
+        self.assertEqual([{'iface0'}, {'iface1'}], expected_ifaces)
+
 
 class TestOvsdbIdl(base.TestCase):
     def setUp(self):
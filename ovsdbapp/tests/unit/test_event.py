@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from unittest import mock
 
 from ovsdbapp import event
 from ovsdbapp.tests import base
@@ -48,6 +49,61 @@ class TestRowEvent(base.TestCase):
         self.assertNotEqual(TestEvent(priority=1), TestEvent(priority=2))
         self.assertNotEqual(TestEvent(), OtherTestEvent())
 
+    def test_shared_table_and_events(self):
+        table = "".join(["Fake", "Table"])
+        r1 = TestEvent(events=tuple(["create", "update"]), table=table)
+        r2 = TestEvent(events=("create", "update"), table="FakeTable")
+        self.assertIs(r1.table, r2.table)
+        self.assertIs(r1.events, r2.events)
+
+    def test_key_updated(self):
+        r = TestEvent()
+        self.assertEqual((TestEvent, "FakeTable", ("create",)), r.key)
+        old_hash = hash(r)
+        r.table = "OtherTable"
+        r.events = ("delete",)
+        self.assertEqual((TestEvent, "OtherTable", ("delete",)), r.key)
+        self.assertEqual(hash(r.key), hash(r))
+        self.assertNotEqual(old_hash, hash(r))
+
+
+class TestNotificationQueue(base.TestCase):
+    def test_get_batch(self):
+        q = event.NotificationQueue()
+        for i in range(5):
+            q.put(i)
+        self.assertEqual([0, 1, 2], q.get_batch(3))
+        self.assertEqual([3, 4], q.get_batch(3))
+        self.assertTrue(q.empty())
+
+    def test_put_many(self):
+        q = event.NotificationQueue()
+        q.put(0)
+        q.put_many([1, 2, 3])
+        self.assertEqual(4, q.unfinished_tasks)
+        self.assertEqual([0, 1, 2, 3], q.get_batch(10))
+
+    def test_put_many_bounded(self):
+        q = event.NotificationQueue(2)
+        self.assertRaises(ValueError, q.put_many, [1])
+
+    def test_put_unbounded(self):
+        q = event.NotificationQueue(1)
+        q.put(1)
+        q.put_unbounded(2)
+        self.assertEqual([1, 2], q.get_batch(2))
+        self.assertEqual(2, q.unfinished_tasks)
+
+    def test_tasks_done(self):
+        q = event.NotificationQueue()
+        for i in range(3):
+            q.put(i)
+        q.tasks_done(2)
+        self.assertEqual(1, q.unfinished_tasks)
+        q.tasks_done(1)
+        q.join()
+        self.assertRaises(ValueError, q.tasks_done, 1)
+
 
 class TestRowEventHandler(base.TestCase):
     def setUp(self):
@@ -81,7 +137,309 @@ class TestRowEventHandler(base.TestCase):
         self.handler.unwatch_events(removed)
         self.assertEqual(expected, list(self.handler._watched_events))
 
+    def test_unwatch_last_event_of_priority(self):
+        events = [TestEvent(priority=1), TestEvent(priority=2)]
+        self.handler.watch_events(events)
+        self.handler.unwatch_event(events[1])
+        self.handler.unwatch_event(TestEvent(priority=3))
+        self.assertEqual([events[0]], list(self.handler._watched_events))
+        self.assertEqual([1], list(self.handler._queues))
+        self.handler.watch_event(events[1])
+        self.assertEqual(events[::-1], list(self.handler._watched_events))
+
     def test_add_duplicate(self):
         self.handler.watch_event(TestEvent())
         self.handler.watch_event(TestEvent())
         self.assertCountEqual(self.handler._watched_events, [TestEvent()])
+
+    def test_matching_events_index(self):
+        class IndexedEvent(TestEvent):
+            def _index_keys(self):
+                return frozenset((self.table, e) for e in self.events)
+
+            def matches(self, event, row, old=None):
+                return True
+
+        class UnindexedEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        row = mock.Mock()
+        row._table.name = "FakeTable"
+        indexed = IndexedEvent(priority=1)
+        other_table = IndexedEvent(table="OtherTable", priority=2)
+        unindexed = UnindexedEvent(table="OtherTable", priority=3)
+        self.handler.watch_events([indexed, other_table, unindexed])
+        self.assertEqual(
+            (unindexed, indexed),
+            self.handler.matching_events(TestEvent.ROW_CREATE, row, None))
+        self.assertEqual(
+            (unindexed,),
+            self.handler.matching_events(TestEvent.ROW_DELETE, row, None))
+        self.handler.unwatch_event(unindexed)
+        self.assertEqual(
+            (indexed,),
+            self.handler.matching_events(TestEvent.ROW_CREATE, row, None))
+
+    def test_candidates_updated_incrementally(self):
+        class IndexedEvent(TestEvent):
+            def _index_keys(self):
+                return frozenset((self.table, e) for e in self.events)
+
+        create = IndexedEvent(priority=1)
+        delete = IndexedEvent((TestEvent.ROW_DELETE,), priority=2)
+        self.handler.watch_events([create, delete])
+        create_key = ("FakeTable", TestEvent.ROW_CREATE)
+        delete_key = ("FakeTable", TestEvent.ROW_DELETE)
+        create_candidates = self.handler._get_candidates(*create_key)
+        self.assertEqual([create], [c for c, _ in create_candidates])
+        self.handler._get_candidates(*delete_key)
+        with mock.patch.object(IndexedEvent, '_index_keys',
+                               autospec=True,
+                               side_effect=IndexedEvent._index_keys) as keys:
+            other = IndexedEvent((TestEvent.ROW_DELETE,), priority=3)
+            self.handler.watch_event(other)
+            self.handler.unwatch_event(other)
+            self.handler.watch_event(other)
+        # The keys are only computed when an event is watched
+        self.assertEqual(2, keys.call_count)
+        # Only the candidates of the key of the changed event are rebuilt
+        self.assertIs(create_candidates,
+                      self.handler._get_candidates(*create_key))
+        self.assertEqual(
+            [other, delete],
+            [c for c, _ in self.handler._get_candidates(*delete_key)])
+        self.handler.unwatch_events([other, delete])
+        self.assertEqual((), self.handler._get_candidates(*delete_key))
+        self.assertEqual({create_key: {create}}, self.handler._indexed)
+
+    def test_matching_events_exception(self):
+        class FailingEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                raise Exception()
+
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        ok = MatchEvent(priority=1)
+        self.handler.watch_events([FailingEvent(priority=2), ok])
+        with mock.patch.object(event.LOG, 'exception') as log:
+            self.assertEqual(
+                (ok,), self.handler.matching_events(TestEvent.ROW_CREATE,
+                                                    mock.Mock(), None))
+        log.assert_called_once()
+
+    def test_matching_events_custom_match(self):
+        class CustomHandler(event.RowEventHandler):
+            @staticmethod
+            def match(candidate, event, row, updates):
+                return candidate.priority == 2
+
+        with mock.patch.object(CustomHandler, 'start'):
+            handler = CustomHandler()
+        events = [TestEvent(priority=1), TestEvent(priority=2)]
+        handler.watch_events(events)
+        self.assertEqual(
+            (events[1],),
+            handler.matching_events(TestEvent.ROW_CREATE, mock.Mock(), None))
+
+    @mock.patch.object(event.time, 'sleep')
+    def test_matching_events_yields(self, mock_sleep):
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return self.priority % 2
+
+        self.handler.MATCH_YIELD_INTERVAL = 4
+        events = [MatchEvent(priority=p) for p in range(10)]
+        self.handler.watch_events(events)
+        row = mock.Mock()
+        self.assertEqual(
+            tuple(events[9::-2]),
+            self.handler.matching_events(TestEvent.ROW_CREATE, row, None))
+        self.assertEqual(2, mock_sleep.call_count)
+        mock_sleep.assert_called_with(0)
+
+    def test_notify_inline_wait_event(self):
+        class FakeWaitEvent(event.WaitEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        wait_event = FakeWaitEvent((TestEvent.ROW_CREATE,), "FakeTable", None)
+        regular = MatchEvent()
+        self.handler.watch_events([wait_event, regular])
+        with mock.patch.object(self.handler.notifications, 'put') as put:
+            self.handler.notify(TestEvent.ROW_CREATE, mock.Mock())
+        self.assertTrue(wait_event.event.is_set())
+        put.assert_called_once_with(
+            (regular, TestEvent.ROW_CREATE, mock.ANY, None), block=False)
+        self.assertEqual([regular], list(self.handler._watched_events))
+
+    def test_wait_event_inline_run(self):
+        class OtherRunEvent(event.WaitEvent):
+            def run(self, event, row, old):
+                pass
+
+        class ExplicitEvent(OtherRunEvent):
+            INLINE_RUN = True
+
+        self.assertTrue(event.WaitEvent.INLINE_RUN)
+        self.assertFalse(OtherRunEvent.INLINE_RUN)
+        self.assertTrue(ExplicitEvent.INLINE_RUN)
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_max_pending(self, mock_start):
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        handler = event.RowEventHandler(max_pending=2)
+        handler.watch_event(MatchEvent())
+        with mock.patch.object(event.LOG, 'warning') as warning, \
+                mock.patch.object(handler.notifications, 'put',
+                                  wraps=handler.notifications.put) as put:
+            for _ in range(3):
+                handler.notify(TestEvent.ROW_CREATE, mock.Mock())
+        # notify() never waits for room in the queue
+        for call in put.call_args_list:
+            self.assertEqual({'block': False}, call.kwargs)
+        self.assertEqual(2, handler.pending())
+        self.assertEqual(1, handler.dropped)
+        warning.assert_called_once()
+        # The queue is full, but the stop request is still queued
+        handler.shutdown()
+        self.assertEqual(3, handler.pending())
+        handler.notify_loop()
+        self.assertEqual(0, handler.pending())
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_coalesce(self, mock_start):
+        class CoalesceEvent(TestEvent):
+            COALESCE = True
+
+            def matches(self, event, row, old=None):
+                return True
+
+        handler = event.RowEventHandler()
+        ev = CoalesceEvent()
+        handler.watch_event(ev)
+        rows = [mock.Mock(uuid='uuid1'), mock.Mock(uuid='uuid1'),
+                mock.Mock(uuid='uuid2')]
+        for i, row in enumerate(rows):
+            handler.notify(TestEvent.ROW_UPDATE, row, i)
+        self.assertEqual(2, handler.pending())
+        handler.shutdown()
+        with mock.patch.object(ev, 'run') as run:
+            handler.notify_loop()
+        # The latest row, with the updates of the first change
+        run.assert_has_calls([mock.call(TestEvent.ROW_UPDATE, rows[1], 0),
+                              mock.call(TestEvent.ROW_UPDATE, rows[2], 2)])
+        self.assertEqual(2, run.call_count)
+        self.assertEqual({}, handler._pending)
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_coalesce_priority_order(self, mock_start):
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        class CoalesceEvent(MatchEvent):
+            COALESCE = True
+
+        handler = event.RowEventHandler()
+        low = CoalesceEvent(priority=1)
+        high = MatchEvent(priority=2)
+        handler.watch_events([low, high])
+        row = mock.Mock(uuid='uuid1')
+        with mock.patch.object(handler.notifications, 'put_many') as put:
+            handler.notify(TestEvent.ROW_UPDATE, row, {'col': 1})
+        put.assert_called_once_with(
+            [(high, TestEvent.ROW_UPDATE, row, {'col': 1}),
+             (low, TestEvent.ROW_UPDATE, row, {'col': 1})])
+
+    def test_merge_updates(self):
+        self.assertEqual({'a': 1, 'b': 2, 'c': 4},
+                         self.handler.merge_updates({'a': 1, 'b': 2},
+                                                    {'b': 3, 'c': 4}))
+        self.assertEqual(mock.sentinel.first,
+                         self.handler.merge_updates(mock.sentinel.first,
+                                                    mock.sentinel.later))
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_put_many(self, mock_start):
+        class MatchEvent(TestEvent):
+            def matches(self, event, row, old=None):
+                return True
+
+        handler = event.RowEventHandler()
+        events = [MatchEvent(priority=1), MatchEvent(priority=2)]
+        handler.watch_events(events)
+        row = mock.Mock()
+        with mock.patch.object(handler.notifications, 'put_many',
+                               wraps=handler.notifications.put_many) as put:
+            handler.notify(TestEvent.ROW_CREATE, row)
+        put.assert_called_once_with(
+            [(events[1], TestEvent.ROW_CREATE, row, None),
+             (events[0], TestEvent.ROW_CREATE, row, None)])
+        self.assertEqual(2, handler.pending())
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_loop_batch(self, mock_start):
+        handler = event.RowEventHandler()
+        onetime = mock.Mock(ONETIME=True, priority=10)
+        regular = mock.Mock(ONETIME=False, priority=20)
+        failing = mock.Mock(ONETIME=False)
+        failing.run.side_effect = Exception
+        after_stop = mock.Mock()
+        handler.watch_events([onetime, regular])
+        for notification in ((onetime, "create", "row1", None),
+                             (failing, "create", "row1", None),
+                             (regular, "update", "row2", None),
+                             event.STOP_EVENT,
+                             (after_stop, "create", "row3", None)):
+            handler.notifications.put(notification)
+        calls = mock.Mock()
+        with mock.patch.object(handler, 'unwatch_events',
+                               wraps=handler.unwatch_events) as unwatch, \
+                mock.patch.object(handler.notifications, 'tasks_done',
+                                  wraps=handler.notifications.tasks_done) \
+                as tasks_done:
+            calls.attach_mock(unwatch, 'unwatch_events')
+            calls.attach_mock(tasks_done, 'tasks_done')
+            handler.notify_loop()
+        onetime.run.assert_called_once_with("create", "row1", None)
+        regular.run.assert_called_once_with("update", "row2", None)
+        after_stop.run.assert_not_called()
+        self.assertEqual([mock.call.unwatch_events([onetime]),
+                          mock.call.tasks_done(5)], calls.mock_calls)
+        self.assertEqual([regular], list(handler._watched_events))
+
+    def test_workers(self):
+        handler = event.RowEventHandler(workers=3)
+        self.assertEqual(3, len(handler.notify_threads))
+        self.assertIs(handler.notify_threads[0], handler.notify_thread)
+        matches = [mock.Mock(ONETIME=False) for _ in range(6)]
+        for match in matches:
+            handler.notifications.put((match, "create", "row", None))
+        handler.shutdown()
+        for thread in handler.notify_threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+        for match in matches:
+            match.run.assert_called_once_with("create", "row", None)
+        # Each worker consumed exactly one stop request
+        self.assertEqual(0, handler.notifications.unfinished_tasks)
+        self.assertEqual(0, handler.pending())
+
+    @mock.patch.object(event.RowEventHandler, 'start')
+    def test_notify_loop_stops_of_other_workers(self, mock_start):
+        handler = event.RowEventHandler(workers=3)
+        handler.shutdown()
+        self.assertEqual(3, handler.pending())
+        handler.notify_loop()
+        self.assertEqual(2, handler.pending())
+        self.assertEqual(2, handler.notifications.unfinished_tasks)
@@ -0,0 +1,27 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from ovsdbapp import exceptions
+from ovsdbapp.tests import base
+
+
+class TestOvsdbAppException(base.TestCase):
+    def test_message(self):
+        ex = exceptions.TimeoutException(commands=['cmd'], timeout=5,
+                                         cause='test')
+        expected = "Commands ['cmd'] exceeded timeout 5 seconds, cause: test"
+        self.assertEqual(expected, str(ex))
+        self.assertEqual((expected,), ex.args)
+
+    def test_message_missing_kwargs(self):
+        ex = exceptions.TimeoutException(commands=['cmd'])
+        self.assertEqual(exceptions.TimeoutException.message, str(ex))